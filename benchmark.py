@@ -0,0 +1,193 @@
+"""
+Benchmark the genetic algorithm and the training pipeline.
+
+Times the Optimizer operations at large population sizes, and model
+compilation and short training runs on the built-in synthetic dataset, so
+no download is needed. Training runs use Keras, or with --backend numpy
+the NumPy MLP, which needs no TensorFlow. Each run is appended to a JSON
+file and compared with the run before it, so regressions show up run
+over run:
+
+    python benchmark.py --sizes 10000 100000 --output benchmark.json
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+from optimizer import Optimizer
+
+nn_param_choices = {
+    'nb_neurons': [64, 128, 256, 512, 768, 1024],
+    'nb_layers': [1, 2, 3, 4],
+    'activation': ['relu', 'elu', 'tanh', 'sigmoid'],
+    'optimizer': ['rmsprop', 'adam', 'sgd', 'adagrad', 'adadelta', 'adamax', 'nadam'],
+}
+
+# Networks timed by the training benchmarks, smallest to largest.
+benchmark_networks = [
+    {'nb_neurons': 64, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'adam'},
+    {'nb_neurons': 512, 'nb_layers': 2, 'activation': 'elu', 'optimizer': 'rmsprop'},
+    {'nb_neurons': 1024, 'nb_layers': 4, 'activation': 'tanh', 'optimizer': 'sgd'},
+]
+
+def best_time(function, repeat):
+    """Return the fastest of several timed calls to a function.
+
+    Args:
+        function (callable): Function to call without arguments
+        repeat (int): Number of times to call it
+
+    Returns:
+        (float): The fastest call in seconds
+
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+def benchmark_optimizer(sizes, repeat):
+    """Time the genetic algorithm operations.
+
+    Args:
+        sizes (list): Population sizes to time
+        repeat (int): Number of times to repeat each measurement
+
+    Returns:
+        (dict): Seconds taken, keyed by benchmark name
+
+    """
+    optimizer = Optimizer(nn_param_choices)
+    results = {}
+
+    for size in sizes:
+        results['create_population[%d]' % size] = best_time(
+            lambda: optimizer.create_population(size), repeat)
+
+        population = optimizer.create_population(size)
+        for network in population:
+            network.accuracy = random.random()
+        results['evolve[%d]' % size] = best_time(
+            lambda: optimizer.evolve(population), repeat)
+
+        # Breed and mutate one pair of parents per member of the population.
+        parents = [(random.choice(population).network, random.choice(population).network)
+                   for _ in range(size)]
+        results['breed[%d]' % size] = best_time(
+            lambda: [optimizer.breed(mother, father) for mother, father in parents], repeat)
+        results['mutate[%d]' % size] = best_time(
+            lambda: [optimizer.mutate(dict(mother)) for mother, father in parents], repeat)
+
+        # The same operations on an array-backed population.
+        results['create_population_array[%d]' % size] = best_time(
+            lambda: optimizer.create_population_array(size), repeat)
+
+        genomes, fitness = optimizer.create_population_array(size)
+        fitness[:] = [network.accuracy for network in population]
+        results['evolve_array[%d]' % size] = best_time(
+            lambda: optimizer.evolve_array(genomes, fitness), repeat)
+
+    return results
+
+def benchmark_training(repeat, epochs, backend='keras'):
+    """Time model compilation and short training runs on synthetic data.
+
+    Args:
+        repeat (int): Number of times to repeat each measurement
+        epochs (int): Epochs in each training run
+        backend (str): What trains the networks, 'keras' or 'numpy'
+
+    Returns:
+        (dict): Seconds taken, keyed by benchmark name
+
+    """
+    from budget import TrainingBudget
+    from datasets import load_dataset
+    from evaluator import get_trainer
+
+    nb_classes, batch_size, input_shape, *arrays = load_dataset('synthetic')
+    budget = TrainingBudget(max_epochs=epochs)
+    train_and_evaluate = get_trainer(backend)
+    results = {}
+
+    # Keep the Keras names so earlier runs stay comparable.
+    fit = 'fit' if backend == 'keras' else 'fit_' + backend
+
+    for network in benchmark_networks:
+        name = '%(nb_layers)dx%(nb_neurons)d-%(activation)s-%(optimizer)s' % network
+        if backend == 'keras':
+            from train import compile_model
+
+            # Building a model and reusing a cached one are timed apart, so
+            # a slower build_model still shows and earlier runs stay comparable.
+            results['compile_model[%s]' % name] = best_time(
+                lambda: compile_model(network, nb_classes, input_shape, reuse=False), repeat)
+            compile_model(network, nb_classes, input_shape)
+            results['compile_model_reuse[%s]' % name] = best_time(
+                lambda: compile_model(network, nb_classes, input_shape), repeat)
+        results['%s[%s]' % (fit, name)] = best_time(
+            lambda: train_and_evaluate(network, 'synthetic', budget), repeat)
+
+    return results
+
+def compare(previous, current):
+    """Print how each benchmark changed since the previous run.
+
+    Args:
+        previous (dict): Results of the previous run
+        current (dict): Results of this run
+
+    """
+    for name, seconds in sorted(current.items()):
+        line = '%-50s %10.4fs' % (name, seconds)
+        if previous.get(name):
+            line += '  %6.2fx' % (seconds / previous[name])
+        print(line)
+
+def main():
+    """Run the benchmarks and record the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000],
+                        help='population sizes for the optimizer benchmarks')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='times to repeat each measurement, keeping the fastest')
+    parser.add_argument('--epochs', type=int, default=2,
+                        help='epochs in each training benchmark')
+    parser.add_argument('--skip-training', action='store_true',
+                        help='only run the optimizer benchmarks')
+    parser.add_argument('--backend', choices=['keras', 'numpy'], default='keras',
+                        help='what trains the networks in the training benchmarks')
+    parser.add_argument('--output', default='benchmark.json',
+                        help='JSON file the run is appended to')
+    args = parser.parse_args()
+
+    random.seed(0)
+    results = benchmark_optimizer(args.sizes, args.repeat)
+    if not args.skip_training:
+        results.update(benchmark_training(args.repeat, args.epochs, args.backend))
+
+    try:
+        with open(args.output) as f:
+            runs = json.load(f)
+    except FileNotFoundError:
+        runs = []
+
+    compare(runs[-1]['results'] if runs else {}, results)
+
+    runs.append({
+        'time': time.time(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'args': vars(args),
+        'results': results,
+    })
+    with open(args.output, 'w') as f:
+        json.dump(runs, f, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    main()
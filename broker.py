@@ -0,0 +1,181 @@
+"""
+Task queue shared by a coordinator and the workers that train networks.
+
+The queue is a SQLite database, so any machine that can open the file
+(e.g. on a shared filesystem) can take part, and several worker processes
+on one machine can be used for testing. SQLite locking is unreliable on
+some network filesystems, so prefer a local disk when every process runs
+on the same host.
+
+Workers claim queued tasks and send a heartbeat while training. Tasks
+whose worker stops sending heartbeats are put back in the queue.
+"""
+import json
+import time
+import sqlite3
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    network TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    options TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    heartbeat REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+"""
+
+class SQLiteBroker():
+    """Queue of training tasks stored in a SQLite database."""
+
+    def __init__(self, path, heartbeat_timeout=120., max_attempts=3):
+        """Open a broker, creating the database if needed.
+
+        Args:
+            path (str): Database file shared by the coordinator and workers
+            heartbeat_timeout (float): Seconds without a heartbeat after
+                which a running task is put back in the queue
+            max_attempts (int): Times a task may be claimed before it is
+                marked as failed
+
+        """
+        self.path = path
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """Open a new connection, so the broker can be used from any thread."""
+        connection = sqlite3.connect(self.path, timeout=60., isolation_level=None)
+        connection.row_factory = sqlite3.Row
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def put(self, network, dataset, options):
+        """Queue a network for training.
+
+        Args:
+            network (dict): The network parameters
+            dataset (str): Dataset to use for training/evaluating
+            options (dict): JSON-serializable arguments for the trainer
+
+        Returns:
+            (int): Id of the task
+
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO tasks (network, dataset, options) VALUES (?, ?, ?)",
+                (json.dumps(network), dataset, json.dumps(options)))
+            return cursor.lastrowid
+
+    def claim(self, worker):
+        """Take the oldest queued task.
+
+        Args:
+            worker (str): Name of the worker claiming the task
+
+        Returns:
+            (tuple): Task id, network parameters, dataset and options, or
+                None if the queue is empty
+
+        """
+        with self._connect() as connection:
+            # Take the write lock first so two workers cannot claim one task.
+            connection.execute("BEGIN IMMEDIATE")
+            row = connection.execute(
+                "SELECT id, network, dataset, options FROM tasks "
+                "WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE tasks SET status = 'running', worker = ?, heartbeat = ?, "
+                    "attempts = attempts + 1 WHERE id = ?", (worker, time.time(), row['id']))
+            connection.execute("COMMIT")
+
+        if row is None:
+            return None
+
+        return row['id'], json.loads(row['network']), row['dataset'], json.loads(row['options'])
+
+    def heartbeat(self, task_id, worker):
+        """Tell the coordinator a task is still being worked on.
+
+        Returns:
+            (bool): False if the task was taken away from this worker
+
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE tasks SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), task_id, worker))
+            return cursor.rowcount == 1
+
+    def complete(self, task_id, worker, result):
+        """Store the result of a finished task."""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE tasks SET status = 'done', result = ? WHERE id = ? AND worker = ?",
+                (json.dumps(result, default=float), task_id, worker))
+
+    def fail(self, task_id, worker, error):
+        """Mark a task as failed with an error message."""
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE tasks SET status = 'failed', error = ? WHERE id = ? AND worker = ?",
+                (error, task_id, worker))
+
+    def requeue_stale(self):
+        """Put tasks whose worker stopped sending heartbeats back in the queue.
+
+        Returns:
+            (int): Number of tasks requeued
+
+        """
+        deadline = time.time() - self.heartbeat_timeout
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE tasks SET status = 'failed', error = 'worker lost too many times' "
+                "WHERE status = 'running' AND heartbeat < ? AND attempts >= ?",
+                (deadline, self.max_attempts))
+            cursor = connection.execute(
+                "UPDATE tasks SET status = 'queued', worker = NULL "
+                "WHERE status = 'running' AND heartbeat < ?", (deadline,))
+            return cursor.rowcount
+
+    def finished(self, task_ids):
+        """Return the tasks among task_ids that are done or failed.
+
+        Args:
+            task_ids (iterable): Ids of the tasks to check
+
+        Returns:
+            (dict): Task id -> (status, result dict or error message)
+
+        """
+        task_ids = list(task_ids)
+        finished = {}
+        with self._connect() as connection:
+            # Stay well below SQLite's limit on query parameters.
+            for i in range(0, len(task_ids), 500):
+                chunk = task_ids[i:i + 500]
+                rows = connection.execute(
+                    "SELECT id, status, result, error FROM tasks WHERE status IN ('done', 'failed') "
+                    "AND id IN (%s)" % ','.join('?' * len(chunk)), chunk)
+                for row in rows:
+                    if row['status'] == 'done':
+                        finished[row['id']] = ('done', json.loads(row['result']))
+                    else:
+                        finished[row['id']] = ('failed', row['error'])
+
+        return finished
@@ -1,98 +1,227 @@
-"""Iterate over every combination of hyperparameters."""
-import logging
-from network import Network
-from tqdm import tqdm
-
-# Setup logging.
-logging.basicConfig(
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%m/%d/%Y %I:%M:%S %p',
-    level=logging.DEBUG,
-    filename='brute-log.txt'
-)
-
-def train_networks(networks, dataset):
-    """Train each network.
-
-    Args:
-        networks (list): Current population of networks
-        dataset (str): Dataset to use for training/evaluating
-    """
-    pbar = tqdm(total=len(networks))
-    for network in networks:
-        network.train(dataset)
-        network.print_network()
-        pbar.update(1)
-    pbar.close()
-
-    # Sort our final population.
-    networks = sorted(networks, key=lambda x: x.accuracy, reverse=True)
-
-    # Print out the top 5 networks.
-    print_networks(networks[:5])
-
-def print_networks(networks):
-    """Print a list of networks.
-
-    Args:
-        networks (list): The population of networks
-
-    """
-    logging.info('-'*80)
-    for network in networks:
-        network.print_network()
-
-def generate_network_list(nn_param_choices):
-    """Generate a list of all possible networks.
-
-    Args:
-        nn_param_choices (dict): The parameter choices
-
-    Returns:
-        networks (list): A list of network objects
-
-    """
-    networks = []
-
-    # This is silly.
-    for nbn in nn_param_choices['nb_neurons']:
-        for nbl in nn_param_choices['nb_layers']:
-            for a in nn_param_choices['activation']:
-                for o in nn_param_choices['optimizer']:
-
-                    # Set the parameters.
-                    network = {
-                        'nb_neurons': nbn,
-                        'nb_layers': nbl,
-                        'activation': a,
-                        'optimizer': o,
-                    }
-
-                    # Instantiate a network object with set parameters.
-                    network_obj = Network()
-                    network_obj.create_set(network)
-
-                    networks.append(network_obj)
-
-    return networks
-
-def main():
-    """Brute force test every network."""
-    dataset = 'cifar10'
-
-    nn_param_choices = {
-        'nb_neurons': [64, 128, 256, 512, 768, 1024],
-        'nb_layers': [1, 2, 3, 4],
-        'activation': ['relu', 'elu', 'tanh', 'sigmoid'],
-        'optimizer': ['rmsprop', 'adam', 'sgd', 'adagrad',
-                      'adadelta', 'adamax', 'nadam'],
-    }
-
-    logging.info("***Brute forcing networks***")
-
-    networks = generate_network_list(nn_param_choices)
-
-    train_networks(networks, dataset)
-
-if __name__ == '__main__':
-    main()
+"""Iterate over every combination of hyperparameters."""
+import math
+import time
+import heapq
+import random
+import logging
+from itertools import islice
+from network import Network
+from datasets import evict_dataset
+from evaluator import SerialEvaluator, ProcessPoolEvaluator
+from fitness_store import FitnessStore
+from budget import budget_for
+from log_config import setup_logging
+
+def train_networks(networks, dataset, evaluator=None, time_budget=None,
+                   network_timeout=None, chunk_size=16, top=5, backend='keras', scored=()):
+    """Train each network.
+
+    Networks are taken from the iterable one chunk at a time, so training
+    starts straight away and only the best networks are kept in memory.
+
+    Args:
+        networks (iterable): Networks to train, e.g. from iter_networks
+        dataset (str): Dataset to use for training/evaluating
+        evaluator (Evaluator): Evaluator that does the training,
+            defaults to training one network at a time
+        time_budget (float): Seconds after which no more networks are
+            started, or None to train every network
+        network_timeout (float): Seconds any one network may train for
+            before it is stopped and its fitness penalized
+        chunk_size (int): Networks trained between time budget checks
+        top (int): Number of best networks to keep and print
+        backend (str): What trains the networks when no evaluator is
+            given, 'keras' or 'numpy' for a fast proxy without TensorFlow
+        scored (iterable): Networks scored by an earlier run, which count
+            towards the best without being trained again
+
+    Returns:
+        (list): The best trained networks, best first
+    """
+    start_time = time.monotonic()
+    if evaluator is None:
+        evaluator = SerialEvaluator(backend=backend)
+
+    budget = evaluator.budget
+    if network_timeout is not None:
+        budget = (budget or budget_for(dataset)).replace(max_seconds=network_timeout)
+
+    networks = iter(networks)
+    best = heapq.nlargest(top, scored, key=lambda x: x.accuracy)
+    trained = 0
+    while True:
+        if time_budget is not None and time.monotonic() - start_time >= time_budget:
+            logging.info("***Time budget spent after %d networks***", trained)
+            break
+
+        chunk = list(islice(networks, chunk_size))
+        if not chunk:
+            break
+
+        evaluator.evaluate(chunk, dataset, budget)
+        for network in chunk:
+            network.print_network()
+        trained += len(chunk)
+        best = heapq.nlargest(top, best + chunk, key=lambda x: x.accuracy)
+
+    # Print out the top networks.
+    print_networks(best)
+
+    return best
+
+def stored_networks(store, dataset):
+    """Yield the networks a store holds scores for.
+
+    Args:
+        store (FitnessStore): Record of scored networks
+        dataset (str): Dataset the networks were scored on
+
+    Yields:
+        (Network): network objects with their stored accuracy
+
+    """
+    for record in store.records.values():
+        if record['dataset'] != dataset:
+            continue
+
+        network = Network()
+        network.create_set(record['network'])
+        network.accuracy = record['accuracy']
+        yield network
+
+def print_networks(networks):
+    """Print a list of networks.
+
+    Args:
+        networks (list): The population of networks
+
+    """
+    logging.info('-'*80)
+    for network in networks:
+        network.print_network()
+
+def _random_permutation(count, rng):
+    """Yield 0..count-1 in a random order without storing them.
+
+    Uses the affine map i -> (a * i + c) mod count, which visits every
+    index exactly once when a and count are coprime.
+    """
+    if count < 2:
+        yield from range(count)
+        return
+
+    a = rng.randrange(1, count)
+    while math.gcd(a, count) != 1:
+        a = rng.randrange(1, count)
+    c = rng.randrange(count)
+
+    for i in range(count):
+        yield (a * i + c) % count
+
+def iter_networks(nn_param_choices, shard=0, num_shards=1, shuffle=False,
+                  seed=None, skip=None):
+    """Lazily generate every combination of parameters as a network.
+
+    Args:
+        nn_param_choices (dict): The parameter choices
+        shard (int): Index of this worker, from 0 to num_shards - 1
+        num_shards (int): Number of workers sharing the search space
+        shuffle (bool): Visit the combinations in a random order, without
+            repeats. Workers sharing a search space must use the same seed.
+        seed (int): Seed for the random order
+        skip (callable): Called with each network's parameters, returns
+            True for networks that should not be generated, e.g. ones
+            that were already scored
+
+    Yields:
+        (Network): network objects, one per combination
+
+    """
+    keys = list(nn_param_choices)
+    choices = [nn_param_choices[key] for key in keys]
+    count = math.prod(len(values) for values in choices)
+
+    if shuffle:
+        indices = _random_permutation(count, random.Random(seed))
+    else:
+        indices = iter(range(count))
+
+    for position, index in enumerate(indices):
+        if position % num_shards != shard:
+            continue
+
+        # Decode the index with the last parameter varying fastest.
+        network = {}
+        for key, values in zip(reversed(keys), reversed(choices)):
+            index, choice = divmod(index, len(values))
+            network[key] = values[choice]
+        network = {key: network[key] for key in keys}
+
+        if skip is not None and skip(network):
+            continue
+
+        # Instantiate a network object with set parameters.
+        network_obj = Network()
+        network_obj.create_set(network)
+
+        yield network_obj
+
+def generate_network_list(nn_param_choices):
+    """Generate a list of all possible networks.
+
+    Args:
+        nn_param_choices (dict): The parameter choices
+
+    Returns:
+        networks (list): A list of network objects
+
+    """
+    return list(iter_networks(nn_param_choices))
+
+def main():
+    """Brute force test every network."""
+    setup_logging('brute-log.txt', 'brute-metrics.jsonl')
+
+    dataset = 'cifar10'
+    workers = 4  # Number of networks to train at once.
+    backend = 'keras'  # Or 'numpy' to screen with a fast proxy, then retrain the best.
+    suffix = '' if backend == 'keras' else '-' + backend  # Backends keep separate scores.
+    store = FitnessStore('brute-fitness%s.jsonl' % suffix)  # Scores kept across restarts.
+    data_dir = 'data'  # Preprocessed datasets shared by the workers.
+    time_budget = 8 * 60 * 60  # Seconds before no new network starts.
+    network_timeout = 30 * 60  # Seconds any one network may train for.
+    shard, num_shards = 0, 1  # This machine's share of the search space.
+
+    nn_param_choices = {
+        'nb_neurons': [64, 128, 256, 512, 768, 1024],
+        'nb_layers': [1, 2, 3, 4],
+        'activation': ['relu', 'elu', 'tanh', 'sigmoid'],
+        'optimizer': ['rmsprop', 'adam', 'sgd', 'adagrad',
+                      'adadelta', 'adamax', 'nadam'],
+    }
+
+    logging.info("***Brute forcing networks***")
+
+    # Visit the grid in a random order so a partial run samples it evenly.
+    networks = iter_networks(nn_param_choices, shard, num_shards, shuffle=True, seed=0,
+                             skip=lambda network: store.get(network, dataset) is not None)
+
+    with ProcessPoolEvaluator(workers=workers, store=store, data_dir=data_dir,
+                              backend=backend) as evaluator:
+        # Networks scored before a restart still compete for the best.
+        best = train_networks(networks, dataset, evaluator, time_budget, network_timeout,
+                              scored=stored_networks(store, dataset))
+
+    if backend != 'keras':
+        # Score the finalists of the proxy screen with the real trainer.
+        logging.info("***Retraining the best networks with Keras***")
+        for network in best:
+            network.accuracy = 0.
+        with ProcessPoolEvaluator(workers=workers, store=FitnessStore('brute-fitness.jsonl'),
+                                  data_dir=data_dir) as evaluator:
+            train_networks(best, dataset, evaluator, network_timeout=network_timeout)
+
+    evict_dataset(dataset)
+
+if __name__ == '__main__':
+    main()
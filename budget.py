@@ -0,0 +1,53 @@
+"""Limits on how long a single network may train."""
+from datasets import split_fidelity
+
+class TrainingBudget():
+    """Epoch, early stopping and wall time limits for training one network."""
+
+    def __init__(self, max_epochs=100, patience=2, min_delta=0., monitor='val_loss',
+                 max_seconds=None, restore_best_weights=True, batch_size=None):
+        """Create a training budget.
+
+        Args:
+            max_epochs (int): Epoch to stop training at
+            patience (int): Epochs without improvement before stopping early
+            min_delta (float): Smallest change in the monitored value that
+                counts as an improvement
+            monitor (str): Value watched for early stopping
+            max_seconds (float): Wall time to stop training after, or None
+                for no limit
+            restore_best_weights (bool): Whether to roll back to the best
+                epoch's weights when stopping early
+            batch_size (int): Examples per training batch, or None for the
+                dataset's default. A 'batch_size' network parameter takes
+                precedence.
+
+        """
+        self.max_epochs = max_epochs
+        self.patience = patience
+        self.min_delta = min_delta
+        self.monitor = monitor
+        self.max_seconds = max_seconds
+        self.restore_best_weights = restore_best_weights
+        self.batch_size = batch_size
+
+    def __repr__(self):
+        fields = ', '.join('%s=%r' % item for item in vars(self).items())
+        return 'TrainingBudget(%s)' % fields
+
+    def __eq__(self, other):
+        return isinstance(other, TrainingBudget) and vars(self) == vars(other)
+
+    def replace(self, **changes):
+        """Return a copy of the budget with some limits changed."""
+        return TrainingBudget(**dict(vars(self), **changes))
+
+# Budgets used when none is given, by dataset.
+DEFAULT_BUDGETS = {
+    'cifar10': TrainingBudget(patience=2),
+    'mnist': TrainingBudget(patience=2, min_delta=1e-3),
+}
+
+def budget_for(dataset):
+    """Return the default training budget for a dataset, at any fidelity."""
+    return DEFAULT_BUDGETS.get(split_fidelity(dataset)[0], TrainingBudget())
@@ -1,27 +1,20 @@
 from network import Network
-from tqdm import tqdm
+from evaluator import SerialEvaluator
+from log_config import setup_logging
 import logging
 
-# Setup logging.
-logging.basicConfig(
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%m/%d/%Y %I:%M:%S %p',
-    level=logging.DEBUG,
-    filename='log.txt'
-)
-
-def train_networks(networks, dataset):
+def train_networks(networks, dataset, evaluator=None):
     """Train each network.
 
     Args:
         networks (list): Current population of networks
         dataset (str): Dataset to use for training/evaluating
+        evaluator (Evaluator): Evaluator that does the training,
+            defaults to training one network at a time
     """
-    pbar = tqdm(total=len(networks))
-    for network in networks:
-        network.train(dataset)
-        pbar.update(1)
-    pbar.close()
+    if evaluator is None:
+        evaluator = SerialEvaluator()
+    evaluator.evaluate(networks, dataset)
 
 def print_networks(networks):
     """Print a list of networks.
@@ -60,7 +53,7 @@ def generate(networks, dataset):
 
     # Get the average accuracy for this generation.
     average_accuracy = get_average_accuracy(networks)
-    logging.info("Generation average: %.2f%%" % (average_accuracy * 100))
+    logging.info("Generation average: %.2f%%", average_accuracy * 100)
     logging.info('-'*80)
 
     # Sort our final population.
@@ -69,28 +62,32 @@ def generate(networks, dataset):
     print_networks(networks)
     logging.info('-'*80)
 
-# hand tuned network params
-networkParams = [
-        {'nb_neurons': 768, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'},\
-        {'nb_neurons': 768, 'nb_layers': 2, 'activation': 'relu', 'optimizer': 'sgd'},\
-        {'nb_neurons': 768, 'nb_layers': 3, 'activation': 'relu', 'optimizer': 'sgd'},\
-        {'nb_neurons': 768, 'nb_layers': 4, 'activation': 'relu', 'optimizer': 'sgd'},\
-        # {'nb_neurons': 768, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'},\
-        # {'nb_neurons': 1024, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'},\
-        # {'nb_neurons': 256, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
-        ]
-
-# create networks and set their params
-networkList = []
-for params in networkParams:
-    newNetwork = Network()
-    newNetwork.create_set(params)
-    networkList.append(newNetwork)
-
-
-dataset = 'mnist'
-logging.info(f'Dataset: {dataset}')
-generate(networkList,dataset)
+def main():
+    """Train a hand-picked list of networks."""
+    setup_logging('log.txt', 'metrics.jsonl')
+
+    # hand tuned network params
+    networkParams = [
+            {'nb_neurons': 768, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'},\
+            {'nb_neurons': 768, 'nb_layers': 2, 'activation': 'relu', 'optimizer': 'sgd'},\
+            {'nb_neurons': 768, 'nb_layers': 3, 'activation': 'relu', 'optimizer': 'sgd'},\
+            {'nb_neurons': 768, 'nb_layers': 4, 'activation': 'relu', 'optimizer': 'sgd'},\
+            # {'nb_neurons': 768, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'},\
+            # {'nb_neurons': 1024, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'},\
+            # {'nb_neurons': 256, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
+            ]
+
+    # create networks and set their params
+    networkList = []
+    for params in networkParams:
+        newNetwork = Network()
+        newNetwork.create_set(params)
+        networkList.append(newNetwork)
+
+
+    dataset = 'mnist'
+    logging.info('Dataset: %s', dataset)
+    generate(networkList,dataset)
 
 # train_networks(networkList)
 
@@ -103,4 +100,5 @@ generate(networkList,dataset)
 # # Print out the networks.
 # print_networks(networkList)
 
-
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+"""
+Load, preprocess and cache the datasets used for training.
+
+Preprocessing CIFAR10 or MNIST is expensive, so each dataset is loaded
+once per process and every caller is handed read-only views of the same
+arrays. Call evict_dataset() to release a dataset that is no longer needed.
+
+When a data directory is set, the preprocessed arrays are also written
+there as .npy files and memory-mapped on load. Processes that map the same
+files share one copy of the data through the page cache, and later runs
+skip preprocessing entirely.
+
+Datasets too large for memory can be stored as a directory of .npy shards
+and requested as 'shards:<directory>'; they are streamed shard by shard
+instead of being loaded.
+
+A name ending in '@<fraction>', e.g. 'cifar10@0.1', trains and validates
+on a stratified sample of that fraction of the data. Scores at different
+fidelities are cached under different names, so they never mix.
+
+NumPy and Keras are only imported by the functions that use them, so a
+process that just handles dataset names never loads them.
+"""
+import os
+import json
+import logging
+import tempfile
+
+# Preprocessed datasets, keyed by name.
+_cache = {}
+
+# Directory holding memory-mapped copies of the datasets, if any.
+_data_dir = None
+
+# Names of the arrays in a dataset, in the order they are returned.
+ARRAYS = ('x_train', 'x_test', 'y_train', 'y_test')
+
+# Prefix of dataset names that refer to a directory of shards.
+SHARDS_PREFIX = 'shards:'
+
+# Separates a dataset name from the fraction of its data to use.
+FIDELITY_SEPARATOR = '@'
+
+def get_cifar10():
+    """Retrieve the CIFAR dataset and process the data."""
+    from keras.datasets import cifar10
+    from keras.utils import to_categorical
+
+    # Set defaults.
+    nb_classes = 10
+    batch_size = 64
+    input_shape = (3072,)
+
+    # Get the data.
+    (x_train, y_train), (x_test, y_test) = cifar10.load_data()
+    x_train = x_train.reshape(50000, 3072)
+    x_test = x_test.reshape(10000, 3072)
+    x_train = x_train.astype('float32')
+    x_test = x_test.astype('float32')
+    x_train /= 255
+    x_test /= 255
+
+    # convert class vectors to binary class matrices
+    y_train = to_categorical(y_train, nb_classes)
+    y_test = to_categorical(y_test, nb_classes)
+
+    return (nb_classes, batch_size, input_shape, x_train, x_test, y_train, y_test)
+
+def get_mnist():
+    """Retrieve the MNIST dataset and process the data."""
+    from keras.datasets import mnist
+    from keras.utils import to_categorical
+
+    # Set defaults.
+    nb_classes = 10
+    batch_size = 128
+    input_shape = (784,)
+
+    # Get the data.
+    (x_train, y_train), (x_test, y_test) = mnist.load_data()
+    x_train = x_train.reshape(60000, 784)
+    x_test = x_test.reshape(10000, 784)
+    x_train = x_train.astype('float32')
+    x_test = x_test.astype('float32')
+    x_train /= 255
+    x_test /= 255
+
+    # convert class vectors to binary class matrices
+    y_train = to_categorical(y_train, nb_classes)
+    y_test = to_categorical(y_test, nb_classes)
+
+    return (nb_classes, batch_size, input_shape, x_train, x_test, y_train, y_test)
+
+def get_synthetic(nb_train=6000, nb_test=1000, nb_features=256, seed=0):
+    """Generate a small classification dataset that needs no download.
+
+    Each class is a Gaussian blob around its own random centre, so the
+    data is learnable but not trivially separable.
+    """
+    import numpy as np
+
+    # Set defaults.
+    nb_classes = 10
+    batch_size = 128
+    input_shape = (nb_features,)
+
+    # Get the data.
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(0., 1., size=(nb_classes, nb_features)).astype('float32')
+
+    def sample(count):
+        labels = rng.integers(0, nb_classes, size=count)
+        noise = rng.normal(0., 2., size=(count, nb_features)).astype('float32')
+        return centres[labels] + noise, labels
+
+    x_train, y_train = sample(nb_train)
+    x_test, y_test = sample(nb_test)
+
+    # convert class vectors to binary class matrices
+    y_train = np.eye(nb_classes, dtype='float32')[y_train]
+    y_test = np.eye(nb_classes, dtype='float32')[y_test]
+
+    return (nb_classes, batch_size, input_shape, x_train, x_test, y_train, y_test)
+
+# Loaders for every dataset that can be requested by name.
+LOADERS = {
+    'cifar10': get_cifar10,
+    'mnist': get_mnist,
+    'synthetic': get_synthetic,
+}
+
+def _read_only(array):
+    """Return a view of an array that cannot be written through."""
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+def set_data_dir(directory):
+    """Memory-map datasets from a directory instead of holding private copies.
+
+    Args:
+        directory (str): Directory for the .npy files, or None to keep
+            datasets in process memory only
+
+    """
+    global _data_dir
+    _data_dir = directory
+
+def materialize_dataset(dataset, directory):
+    """Write a preprocessed dataset to .npy files, unless already written.
+
+    Each file is written under a unique temporary name and renamed into
+    place, and the metadata file is written last, so a dataset directory
+    is only used once it is complete. Several threads or processes may
+    materialize the same dataset at once.
+
+    Args:
+        dataset (str): Name of the dataset, one of LOADERS
+        directory (str): Directory to write the dataset into
+
+    Returns:
+        (str): Directory holding the dataset's files
+
+    """
+    import numpy as np
+
+    target = os.path.join(directory, dataset)
+    meta_path = os.path.join(target, 'meta.json')
+    if os.path.exists(meta_path):
+        return target
+
+    logging.info("Materializing dataset %s in %s", dataset, target)
+    os.makedirs(target, exist_ok=True)
+    nb_classes, batch_size, input_shape, *arrays = LOADERS[dataset]()
+
+    for name, array in zip(ARRAYS, arrays):
+        fd, temp_path = tempfile.mkstemp(suffix='.tmp.npy', prefix=name + '.', dir=target)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(temp_path, os.path.join(target, name + '.npy'))
+
+    meta = {'nb_classes': nb_classes, 'batch_size': batch_size,
+            'input_shape': list(input_shape)}
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', prefix='meta.', dir=target)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(meta, f)
+    os.replace(temp_path, meta_path)
+
+    return target
+
+def _map_dataset(dataset, directory):
+    """Memory-map a materialized dataset read-only."""
+    import numpy as np
+
+    target = materialize_dataset(dataset, directory)
+    with open(os.path.join(target, 'meta.json')) as f:
+        meta = json.load(f)
+
+    arrays = tuple(np.load(os.path.join(target, name + '.npy'), mmap_mode='r')
+                   for name in ARRAYS)
+
+    return (meta['nb_classes'], meta['batch_size'], tuple(meta['input_shape'])) + arrays
+
+def load_dataset(dataset):
+    """Return a preprocessed dataset, loading it on first use.
+
+    Args:
+        dataset (str): Name of the dataset, one of LOADERS
+
+    Returns:
+        (tuple): nb_classes, batch_size, input_shape, x_train, x_test,
+            y_train, y_test, where the arrays are read-only views
+
+    """
+    if dataset not in LOADERS:
+        raise ValueError("Unknown dataset %r, expected one of %s" %
+                         (dataset, sorted(LOADERS)))
+
+    if dataset not in _cache:
+        logging.info("Loading dataset %s", dataset)
+        if _data_dir is None:
+            loaded = LOADERS[dataset]()
+        else:
+            loaded = _map_dataset(dataset, _data_dir)
+        nb_classes, batch_size, input_shape, x_train, x_test, y_train, y_test = loaded
+
+        # Freeze the cached arrays so no caller can modify them in place.
+        arrays = tuple(_read_only(array) for array in (x_train, x_test, y_train, y_test))
+        _cache[dataset] = (nb_classes, batch_size, input_shape) + arrays
+
+    nb_classes, batch_size, input_shape, *arrays = _cache[dataset]
+
+    return (nb_classes, batch_size, input_shape) + tuple(array.view() for array in arrays)
+
+def evict_dataset(dataset=None):
+    """Drop a dataset from the cache so its memory can be reclaimed.
+
+    Args:
+        dataset (str): Name of the dataset to drop, or None to drop all
+
+    """
+    if dataset is None:
+        _cache.clear()
+    else:
+        _cache.pop(dataset, None)
+
+def cached_datasets():
+    """Return the names of the datasets currently held in memory."""
+    return sorted(_cache)
+
+def with_fidelity(dataset, fidelity):
+    """Return the name of a dataset subsampled to a fraction of its data.
+
+    Args:
+        dataset (str): Name of the dataset
+        fidelity (float): Fraction of the data to use, 1 for all of it
+
+    Returns:
+        (str): The dataset name to train and cache scores under
+
+    """
+    if fidelity is None or fidelity >= 1.:
+        return dataset
+    if not 0. < fidelity:
+        raise ValueError("Fidelity must be positive, got %r" % fidelity)
+
+    return '%s%s%g' % (dataset, FIDELITY_SEPARATOR, fidelity)
+
+def split_fidelity(dataset):
+    """Split a dataset name into the underlying dataset and its fidelity.
+
+    Args:
+        dataset (str): A name returned by with_fidelity()
+
+    Returns:
+        (tuple): Name of the full dataset and the fraction of it to use
+
+    """
+    base, separator, fidelity = dataset.rpartition(FIDELITY_SEPARATOR)
+    if separator:
+        try:
+            return base, float(fidelity)
+        except ValueError:
+            pass
+
+    return dataset, 1.
+
+def stratified_subset(y, fraction, seed=0):
+    """Pick a fraction of the examples, keeping the balance of classes.
+
+    The same examples are picked for every call with the same seed, so
+    all networks at one fidelity are scored on the same data.
+
+    Args:
+        y (ndarray): One-hot targets
+        fraction (float): Fraction of the examples to keep
+        seed (int): Seed for the choice of examples
+
+    Returns:
+        (ndarray): Sorted indices of the chosen examples
+
+    """
+    import numpy as np
+
+    labels = np.argmax(y, axis=1)
+    rng = np.random.default_rng(seed)
+
+    chosen = []
+    for label in np.unique(labels):
+        members = np.flatnonzero(labels == label)
+        count = max(1, int(round(len(members) * fraction)))
+        chosen.append(rng.choice(members, count, replace=False))
+
+    return np.sort(np.concatenate(chosen))
+
+def write_shards(dataset, directory, shard_size=10000):
+    """Write a dataset as a directory of .npy shards.
+
+    Any dataset stored in the same layout can be streamed, so this also
+    documents the format: meta.json holds nb_classes, batch_size,
+    input_shape and, for each split, the list of [x file, y file] pairs.
+
+    Args:
+        dataset (str): Name of the dataset, one of LOADERS
+        directory (str): Directory to write the shards into
+        shard_size (int): Examples per shard
+
+    Returns:
+        (str): The name to request the sharded dataset by
+
+    """
+    import numpy as np
+
+    nb_classes, batch_size, input_shape, x_train, x_test, y_train, y_test = \
+        load_dataset(dataset)
+    os.makedirs(directory, exist_ok=True)
+
+    meta = {'nb_classes': nb_classes, 'batch_size': batch_size,
+            'input_shape': list(input_shape), 'splits': {}}
+    for split, x, y in (('train', x_train, y_train), ('test', x_test, y_test)):
+        shards = []
+        for i, start in enumerate(range(0, len(x), shard_size)):
+            names = ['%s-%05d.%s.npy' % (split, i, part) for part in ('x', 'y')]
+            np.save(os.path.join(directory, names[0]), x[start:start + shard_size])
+            np.save(os.path.join(directory, names[1]), y[start:start + shard_size])
+            shards.append(names)
+        meta['splits'][split] = shards
+
+    with open(os.path.join(directory, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    return SHARDS_PREFIX + directory
+
+def is_sharded(dataset):
+    """Return whether a dataset name refers to a directory of shards."""
+    return dataset.startswith(SHARDS_PREFIX)
+
+class ShardedDataset():
+    """A dataset stored as a directory of .npy shards."""
+
+    def __init__(self, dataset):
+        """Read the description of a sharded dataset.
+
+        Args:
+            dataset (str): 'shards:' followed by the shard directory
+
+        """
+        self.directory = dataset[len(SHARDS_PREFIX):]
+        with open(os.path.join(self.directory, 'meta.json')) as f:
+            meta = json.load(f)
+
+        self.nb_classes = meta['nb_classes']
+        self.batch_size = meta['batch_size']
+        self.input_shape = tuple(meta['input_shape'])
+        self.splits = meta['splits']
+
+    def shards(self, split):
+        """Return the paths of the x and y files of each shard of a split."""
+        return [tuple(os.path.join(self.directory, name) for name in names)
+                for names in self.splits[split]]
@@ -0,0 +1,129 @@
+"""
+Coordinator side of distributed evaluation.
+
+DistributedEvaluator publishes networks to a SQLiteBroker instead of
+training them itself; worker.py processes on any host pull the tasks,
+train the networks and push back their scores. The coordinator never
+trains anything, so it does not need TensorFlow.
+"""
+import time
+import logging
+import threading
+from concurrent.futures import Future, as_completed
+from evaluator import Evaluator
+from budget import TrainingBudget
+
+def encode_options(options):
+    """Turn trainer arguments into JSON-serializable values."""
+    options = dict(options)
+    if options.get('budget') is not None:
+        options['budget'] = vars(options['budget'])
+    return options
+
+def decode_options(options):
+    """Reverse encode_options."""
+    options = dict(options)
+    if options.get('budget') is not None:
+        options['budget'] = TrainingBudget(**options['budget'])
+    return options
+
+class DistributedEvaluator(Evaluator):
+    """Evaluator that has networks trained by remote workers."""
+
+    # Broker errors in a row after which pending tasks are failed.
+    max_poll_errors = 10
+
+    def __init__(self, broker, workers=1, poll_interval=1., cache=None, store=None,
+                 budget=None, backend='keras'):
+        """Create a distributed evaluator.
+
+        Args:
+            broker (SQLiteBroker): Task queue shared with the workers
+            workers (int): Number of workers expected to pull tasks, used
+                to decide how many networks to keep in flight
+            poll_interval (float): Seconds between checks for results and
+                dead workers
+            cache (FitnessCache): Accuracies of networks already scored
+            store (FitnessStore): Persistent record of scored networks
+            budget (TrainingBudget): Limits on training each network
+            backend (str): What the workers train the networks with, one
+                of evaluator.BACKENDS
+
+        """
+        super().__init__(cache, store, budget, backend)
+        self.broker = broker
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self._futures = {}  # (dict): task id -> Future of its result
+        self._lock = threading.Lock()
+        self._poller = None
+
+    def _submit(self, network, dataset, **options):
+        future = Future()
+        task_id = self.broker.put(network, dataset,
+                                  encode_options(dict(options, backend=self.backend)))
+        with self._lock:
+            self._futures[task_id] = future
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._poll, daemon=True)
+                self._poller.start()
+
+        return future
+
+    def _poll(self):
+        """Resolve futures as their tasks finish, until none are left.
+
+        Errors from the broker, e.g. a database locked by another host, are
+        retried. After max_poll_errors of them in a row every pending task
+        fails, so nothing waits forever on a broker that is gone.
+        """
+        errors = 0
+        while True:
+            with self._lock:
+                task_ids = list(self._futures)
+                if not task_ids:
+                    self._poller = None
+                    return
+
+            try:
+                requeued = self.broker.requeue_stale()
+                finished = self.broker.finished(task_ids)
+            except Exception as error:
+                errors += 1
+                logging.warning("Polling the broker failed (%d in a row): %s", errors, error)
+                if errors >= self.max_poll_errors:
+                    self._fail_pending(error)
+                    return
+                time.sleep(self.poll_interval)
+                continue
+            errors = 0
+
+            if requeued:
+                logging.warning("Requeued %d tasks from unresponsive workers", requeued)
+
+            for task_id, (status, value) in finished.items():
+                with self._lock:
+                    future = self._futures.pop(task_id)
+                if status == 'done':
+                    future.set_result(value)
+                else:
+                    future.set_exception(RuntimeError("Task %d failed: %s" % (task_id, value)))
+
+            time.sleep(self.poll_interval)
+
+    def _fail_pending(self, error):
+        """Fail every pending task and let the next submit start a new poller."""
+        with self._lock:
+            futures = list(self._futures.values())
+            self._futures.clear()
+            self._poller = None
+
+        for future in futures:
+            future.set_exception(RuntimeError("Lost contact with the broker: %s" % error))
+
+    def run(self, genomes, dataset, **options):
+        futures = {self._submit(network, dataset, **options): key
+                   for key, network in genomes.items()}
+
+        for future in as_completed(futures):
+            yield futures[future], future.result()
@@ -0,0 +1,409 @@
+"""
+Evaluators train a population of networks and record their accuracy.
+
+SerialEvaluator trains one network at a time in this process,
+FusedEvaluator trains groups of small networks side by side on shared
+batches, and ProcessPoolEvaluator trains a whole generation concurrently
+in worker processes. All of them skip networks that are already scored,
+share results through a FitnessCache and, when given a FitnessStore,
+persist every result as soon as its network finishes training.
+
+Networks are trained by a backend: Keras by default, or the NumPy MLP in
+numpy_mlp.py as a cheap proxy that needs no TensorFlow.
+"""
+import os
+import logging
+import importlib
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from fitness_cache import FitnessCache, genome_key
+from datasets import is_sharded, materialize_dataset, set_data_dir, split_fidelity
+from profiling import emit
+
+# Modules providing train_and_evaluate(), by backend name.
+BACKENDS = {
+    'keras': 'train',
+    'numpy': 'numpy_mlp',
+}
+
+def get_trainer(backend='keras'):
+    """Import a training backend.
+
+    Args:
+        backend (str): Name of the backend, one of BACKENDS
+
+    Returns:
+        (callable): The backend's train_and_evaluate()
+
+    """
+    if backend not in BACKENDS:
+        raise ValueError("Unknown backend %r, expected one of %s" %
+                         (backend, sorted(BACKENDS)))
+
+    return importlib.import_module(BACKENDS[backend]).train_and_evaluate
+
+class Evaluator():
+    """Base class for evaluators.
+
+    Subclasses implement run(), which trains a batch of networks and
+    yields their results as each one finishes. Subclasses that can train
+    in the background also override _submit() so networks can be
+    dispatched one at a time with submit().
+    """
+
+    # Fraction of its accuracy a network loses for hitting the time limit.
+    timeout_penalty = 0.5
+
+    def __init__(self, cache=None, store=None, budget=None, backend='keras'):
+        """Create an evaluator.
+
+        Args:
+            cache (FitnessCache): Accuracies of networks already scored
+            store (FitnessStore): Persistent record of scored networks,
+                used to skip networks scored by an earlier run
+            budget (TrainingBudget): Limits on training each network,
+                defaults to the dataset's budget
+            backend (str): What trains the networks, one of BACKENDS.
+                Scores differ between backends, so each backend should
+                have its own cache and store.
+
+        """
+        self.cache = cache if cache is not None else FitnessCache()
+        self.store = store
+        self.budget = budget
+        self.backend = backend
+
+        if store is not None:
+            for record in store.records.values():
+                self.cache.record(record['network'], record['dataset'], record['accuracy'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run(self, genomes, dataset, **options):
+        """Train networks, yielding each result as it becomes available.
+
+        Args:
+            genomes (dict): Network parameters keyed by genome key
+            dataset (str): Dataset to use for training/evaluating
+            options: Extra arguments for train_and_evaluate
+
+        Yields:
+            (tuple): genome key and the dict returned by train_and_evaluate
+
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _inheritance(networks, dataset, weights_dir):
+        """Return the training options that let networks inherit weights.
+
+        Args:
+            networks (list): Network objects about to be trained
+            dataset (str): Dataset to use for training/evaluating
+            weights_dir (str): Directory of trained weights, or None to
+                train every network from random weights
+
+        Returns:
+            (dict): Extra arguments for train_and_evaluate
+
+        """
+        if weights_dir is None:
+            return {}
+
+        parents = {genome_key(network.network, dataset): network.parent
+                   for network in networks if network.parent is not None}
+        return {'weights_dir': weights_dir, 'parents': parents}
+
+    def evaluate(self, networks, dataset, budget=None, weights_dir=None):
+        """Train each unscored network and record its accuracy.
+
+        Networks with identical parameters are only trained once, and
+        networks that hit the budget's time limit get a penalized accuracy.
+
+        Args:
+            networks (list): Current population of networks
+            dataset (str): Dataset to use for training/evaluating
+            budget (TrainingBudget): Limits on training each network,
+                defaults to the evaluator's budget
+            weights_dir (str): Directory to keep trained weights in, so
+                children start from their parent's weights
+
+        """
+        from tqdm import tqdm
+
+        pbar = tqdm(total=len(networks))
+
+        # Group the networks that still need training by genome.
+        pending = {}
+        for network in networks:
+            if network.accuracy == 0.:
+                network.accuracy = self.cache.lookup(network.network, dataset) or 0.
+            if network.accuracy == 0.:
+                pending.setdefault(genome_key(network.network, dataset), []).append(network)
+            else:
+                pbar.update(1)
+
+        genomes = {key: group[0].network for key, group in pending.items()}
+        options = self._inheritance([group[0] for group in pending.values()],
+                                    dataset, weights_dir)
+        for key, result in self.run(genomes, dataset, budget=budget or self.budget, **options):
+            group = pending[key]
+            result = self.record(group[0].network, dataset, result)
+            for network in group:
+                network.accuracy = result['accuracy']
+            pbar.update(len(group))
+        pbar.close()
+
+    def _submit(self, network, dataset, **options):
+        """Start training one network, returning a Future of its scores.
+
+        By default the network is trained before this returns.
+        """
+        future = Future()
+        try:
+            for key, result in self.run({genome_key(network, dataset): network}, dataset, **options):
+                future.set_result(result)
+        except Exception as error:
+            future.set_exception(error)
+
+        return future
+
+    def submit(self, network, dataset, budget=None, weights_dir=None):
+        """Start training a network without waiting for it to finish.
+
+        Pass the Future's result to finish() to record it. A network that
+        is already scored gets a Future that is already done.
+
+        Args:
+            network (Network): The network to train
+            dataset (str): Dataset to use for training/evaluating
+            budget (TrainingBudget): Limits on training the network,
+                defaults to the evaluator's budget
+            weights_dir (str): Directory to keep trained weights in, so
+                the network starts from its parent's weights
+
+        Returns:
+            (Future): Resolves to the scores of the network
+
+        """
+        accuracy = self.cache.lookup(network.network, dataset)
+        if accuracy is not None:
+            future = Future()
+            future.set_result({'accuracy': accuracy, 'cached': True})
+            return future
+
+        return self._submit(network.network, dataset, budget=budget or self.budget,
+                            **self._inheritance([network], dataset, weights_dir))
+
+    def finish(self, network, dataset, result):
+        """Record the result of a network started with submit().
+
+        Args:
+            network (Network): The network that was trained
+            dataset (str): Dataset used for training/evaluating
+            result (dict): The result of the Future returned by submit()
+
+        """
+        if not result.get('cached'):
+            result = self.record(network.network, dataset, result)
+        network.accuracy = result['accuracy']
+
+    def record(self, network, dataset, result):
+        """Remember the result of a trained network.
+
+        Args:
+            network (dict): The network parameters
+            dataset (str): Dataset used for training/evaluating
+            result (dict): Scores returned by train_and_evaluate
+
+        Returns:
+            (dict): The scores, with the accuracy penalized if training
+                hit the time limit
+
+        """
+        if result.get('timed_out'):
+            result = dict(result, raw_accuracy=result['accuracy'],
+                          accuracy=result['accuracy'] * (1 - self.timeout_penalty))
+
+        emit('network', key=genome_key(network, dataset), network=network,
+             dataset=dataset, **result)
+        self.cache.record(network, dataset, result['accuracy'])
+        if self.store is not None:
+            self.store.record(network, dataset, result)
+
+        return result
+
+    def close(self):
+        """Release any resources held by the evaluator."""
+
+class SerialEvaluator(Evaluator):
+    """Train each network in turn, in this process."""
+
+    def run(self, genomes, dataset, **options):
+        train_and_evaluate = get_trainer(self.backend)
+
+        for key, network in genomes.items():
+            yield key, train_and_evaluate(network, dataset, **options)
+
+class FusedEvaluator(Evaluator):
+    """Train small Keras networks in groups that share every input batch."""
+
+    def __init__(self, group_size=8, max_neurons=256, cache=None, store=None, budget=None,
+                 backend='keras'):
+        """Create a fused evaluator.
+
+        Args:
+            group_size (int): Most networks trained together
+            max_neurons (int): Networks with wider layers than this gain
+                little from sharing batches and are trained on their own
+            cache (FitnessCache): Accuracies of networks already scored
+            store (FitnessStore): Persistent record of scored networks
+            budget (TrainingBudget): Limits on training each network
+            backend (str): Must be 'keras', the only backend that can
+                train networks in groups
+
+        """
+        if backend != 'keras':
+            raise ValueError("FusedEvaluator can only train with Keras, not %r" % backend)
+        super().__init__(cache, store, budget, backend)
+        self.group_size = group_size
+        self.max_neurons = max_neurons
+
+    def groups(self, genomes):
+        """Split networks into groups that can be trained together.
+
+        Args:
+            genomes (dict): Network parameters keyed by genome key
+
+        Returns:
+            (list): Lists of genome keys, one per group
+
+        """
+        # Networks in a group must use the same batch size.
+        compatible = {}
+        groups = []
+        for key, network in genomes.items():
+            if network['nb_neurons'] > self.max_neurons:
+                groups.append([key])
+            else:
+                compatible.setdefault(network.get('batch_size'), []).append(key)
+
+        for keys in compatible.values():
+            groups.extend(keys[i:i + self.group_size]
+                          for i in range(0, len(keys), self.group_size))
+
+        return groups
+
+    def run(self, genomes, dataset, **options):
+        from train import train_group
+
+        for keys in self.groups(genomes):
+            results = train_group([genomes[key] for key in keys], dataset, **options)
+            yield from zip(keys, results)
+
+def _init_worker(tf_threads, data_dir, backend='keras'):
+    """Point a worker at the shared datasets and limit its TensorFlow threads.
+
+    Args:
+        tf_threads (int): Threads available to each worker
+        data_dir (str): Directory of memory-mapped datasets, if any
+        backend (str): Backend the worker trains with
+
+    """
+    set_data_dir(data_dir)
+
+    for variable in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS'):
+        os.environ[variable] = str(tf_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+
+    if backend != 'keras':
+        return
+
+    try:
+        import tensorflow as tf
+    except ImportError:
+        return
+
+    tf.config.threading.set_intra_op_parallelism_threads(tf_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def _train_in_worker(network, dataset, options, backend='keras'):
+    """Train a network in a worker process and return its scores."""
+    return get_trainer(backend)(network, dataset, **options)
+
+class ProcessPoolEvaluator(Evaluator):
+    """Train the networks of a generation concurrently in worker processes."""
+
+    def __init__(self, workers=None, tf_threads=None, cache=None, store=None,
+                 budget=None, data_dir=None, backend='keras'):
+        """Create a process pool evaluator.
+
+        The pool is started on first use and reused for every generation,
+        so each worker only loads TensorFlow and the dataset once.
+
+        Args:
+            workers (int): Number of worker processes, defaults to the
+                number of CPUs
+            tf_threads (int): TensorFlow threads per worker, defaults to
+                an even share of the CPUs
+            cache (FitnessCache): Accuracies of networks already scored
+            store (FitnessStore): Persistent record of scored networks
+            budget (TrainingBudget): Limits on training each network
+            data_dir (str): Directory to memory-map datasets from, so all
+                workers share one copy of the data. By default each
+                worker loads its own copy.
+            backend (str): What trains the networks, one of BACKENDS
+
+        """
+        super().__init__(cache, store, budget, backend)
+        self.data_dir = data_dir
+        cpus = os.cpu_count() or 1
+        self.workers = workers or cpus
+        self.tf_threads = tf_threads or max(1, cpus // self.workers)
+        self._pool = None
+        self._materialized = set()  # (set): datasets written to data_dir
+
+    def _get_pool(self):
+        """Return the worker pool, starting it if needed."""
+        if self._pool is None:
+            logging.info("Starting %d workers with %d TensorFlow threads each",
+                         self.workers, self.tf_threads)
+            # Forking a process that has already loaded TensorFlow is unsafe.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(self.tf_threads, self.data_dir, self.backend)
+            )
+        return self._pool
+
+    def _submit(self, network, dataset, **options):
+        # Preprocess once, before any training starts, so the workers only
+        # have to map the files. A worker does it, since loading a dataset
+        # may import TensorFlow.
+        dataset_name = split_fidelity(dataset)[0]
+        if (self.data_dir is not None and not is_sharded(dataset_name)
+                and dataset_name not in self._materialized):
+            self._get_pool().submit(materialize_dataset, dataset_name, self.data_dir).result()
+            self._materialized.add(dataset_name)
+
+        return self._get_pool().submit(_train_in_worker, network, dataset, options,
+                                       self.backend)
+
+    def run(self, genomes, dataset, **options):
+        futures = {self._submit(network, dataset, **options): key
+                   for key, network in genomes.items()}
+
+        # Results arrive in completion order, so map them back by future.
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    def close(self):
+        """Shut down the worker pool."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,78 @@
+"""Memoize network fitness so identical architectures are only trained once."""
+import hashlib
+import json
+
+def genome_key(network, dataset):
+    """Return a canonical key for a network trained on a dataset.
+
+    Two networks with the same parameters get the same key regardless of
+    the order their parameters were set in.
+
+    Args:
+        network (dict): The network parameters
+        dataset (str): Dataset used for training/evaluating
+
+    Returns:
+        (str): Hex digest identifying the network/dataset pair
+
+    """
+    canonical = json.dumps([dataset, network], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+class FitnessCache():
+    """Map network parameters to the accuracy they were scored at."""
+
+    def __init__(self, scores=None):
+        """Create a cache.
+
+        Args:
+            scores (dict): Scores to share with other caches, e.g. those of
+                islands evolving in other threads, or None for a new, empty
+                cache. Each cache keeps its own hit and miss counts.
+
+        """
+        # Single dict reads and writes are atomic, so sharing needs no lock.
+        self.scores = scores if scores is not None else {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __contains__(self, key):
+        return key in self.scores
+
+    def lookup(self, network, dataset):
+        """Return the cached accuracy for a network, counting the hit or miss.
+
+        Args:
+            network (dict): The network parameters
+            dataset (str): Dataset used for training/evaluating
+
+        Returns:
+            (float): The cached accuracy, or None if it was never scored
+
+        """
+        accuracy = self.scores.get(genome_key(network, dataset))
+        if accuracy is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return accuracy
+
+    def record(self, network, dataset, accuracy):
+        """Remember the accuracy a network scored.
+
+        Args:
+            network (dict): The network parameters
+            dataset (str): Dataset used for training/evaluating
+            accuracy (float): The accuracy the network scored
+
+        """
+        self.scores[genome_key(network, dataset)] = accuracy
+
+    def reset_counts(self):
+        """Zero the hit and miss counters, e.g. at the start of a generation."""
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,119 @@
+"""
+Append-only record of every network scored, so long runs can resume.
+
+Each line of the store is a JSON object. Network records hold the scores
+of one trained network and are written as soon as it finishes; generation
+records hold a whole scored population so the genetic algorithm can carry
+on from the last completed generation.
+"""
+import os
+import json
+import logging
+from fitness_cache import genome_key
+
+class FitnessStore():
+    """JSON lines file of network scores and completed generations."""
+
+    def __init__(self, path):
+        """Open a store, loading any records already in it.
+
+        Args:
+            path (str): File to append records to
+
+        """
+        self.path = path
+        self.records = {}  # (dict): genome key -> network record
+        self.generations = {}  # (dict): dataset -> last generation record
+        self._load()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, key):
+        return key in self.records
+
+    def _load(self):
+        """Read the records already in the file."""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path) as f:
+            for number, line in enumerate(f, 1):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write can leave a partial last line.
+                    logging.warning("Skipping unreadable line %d of %s", number, self.path)
+                    continue
+
+                if record.get('type') == 'generation':
+                    self.generations[record['dataset']] = record
+                else:
+                    self.records[record['key']] = record
+
+        logging.info("Loaded %d scored networks from %s", len(self.records), self.path)
+
+    def _append(self, record):
+        """Write a record and make sure it reaches the disk."""
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, sort_keys=True) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def get(self, network, dataset):
+        """Return the record of a scored network.
+
+        Args:
+            network (dict): The network parameters
+            dataset (str): Dataset used for training/evaluating
+
+        Returns:
+            (dict): The network record, or None if it was never scored
+
+        """
+        return self.records.get(genome_key(network, dataset))
+
+    def record(self, network, dataset, result):
+        """Store the scores of a trained network.
+
+        Args:
+            network (dict): The network parameters
+            dataset (str): Dataset used for training/evaluating
+            result (dict): Scores returned by train_and_evaluate
+
+        """
+        record = dict(result, type='network', key=genome_key(network, dataset),
+                      dataset=dataset, network=network)
+        self._append(record)
+        self.records[record['key']] = record
+
+    def record_generation(self, generation, networks, dataset):
+        """Store a scored population once a generation completes.
+
+        Args:
+            generation (int): Index of the completed generation
+            networks (list): The scored population of networks
+            dataset (str): Dataset used for training/evaluating
+
+        """
+        record = {
+            'type': 'generation',
+            'generation': generation,
+            'dataset': dataset,
+            'population': [{'network': network.network, 'accuracy': network.accuracy}
+                           for network in networks],
+        }
+        self._append(record)
+        self.generations[dataset] = record
+
+    def last_generation(self, dataset):
+        """Return the last completed generation for a dataset.
+
+        Args:
+            dataset (str): Dataset used for training/evaluating
+
+        Returns:
+            (dict): The generation record, or None if there is none
+
+        """
+        return self.generations.get(dataset)
@@ -0,0 +1,140 @@
+"""
+Compact array-backed genomes for very large populations.
+
+A genome is stored as a vector of small integers, one per parameter, each
+indexing into that parameter's list in nn_param_choices. A population is
+a 2D array with one genome per row plus a parallel array of fitness, and
+selection, crossover and mutation work on the whole population at once
+instead of on one Network object at a time.
+"""
+import numpy as np
+
+class GenomeSpace():
+    """Encode, decode and evolve integer genomes for a set of parameters."""
+
+    def __init__(self, nn_param_choices):
+        """Create a genome space.
+
+        Args:
+            nn_param_choices (dict): Possible network parameters
+
+        """
+        self.keys = list(nn_param_choices)
+        self.choices = [list(nn_param_choices[key]) for key in self.keys]
+        self.sizes = np.array([len(choices) for choices in self.choices])
+        self.dtype = np.uint8 if self.sizes.max() <= 256 else np.uint16
+
+    def encode(self, network):
+        """Return the genome of a network.
+
+        Args:
+            network (dict): The network parameters
+
+        Returns:
+            (ndarray): Index of each parameter's value in its choices
+
+        """
+        return np.array([choices.index(network[key])
+                         for key, choices in zip(self.keys, self.choices)], dtype=self.dtype)
+
+    def decode(self, genome):
+        """Return the network parameters of a genome.
+
+        Args:
+            genome (ndarray): Index of each parameter's value
+
+        Returns:
+            (dict): The network parameters
+
+        """
+        return {key: choices[index]
+                for key, choices, index in zip(self.keys, self.choices, genome.tolist())}
+
+    def random(self, count, rng):
+        """Return a population of random genomes.
+
+        Args:
+            count (int): Number of genomes
+            rng (Generator): Source of randomness
+
+        Returns:
+            (ndarray): One genome per row
+
+        """
+        return rng.integers(0, self.sizes, size=(count, len(self.sizes))).astype(self.dtype)
+
+    def crossover(self, mothers, fathers, rng):
+        """Cross pairs of parents over at a random point each.
+
+        Args:
+            mothers (ndarray): One parent genome per row
+            fathers (ndarray): The other parent of each pair
+
+        Returns:
+            (tuple): Two arrays of children, one child of each pair in each
+
+        """
+        points = rng.integers(1, len(self.sizes), size=len(mothers))
+        from_mother = np.arange(len(self.sizes)) < points[:, None]
+
+        return (np.where(from_mother, mothers, fathers),
+                np.where(from_mother, fathers, mothers))
+
+    def mutate(self, genomes, mutate_chance, rng):
+        """Randomly change one parameter of some genomes.
+
+        Args:
+            genomes (ndarray): One genome per row
+            mutate_chance (float): Probability each genome is mutated
+
+        Returns:
+            (ndarray): Mutated copy of the genomes
+
+        """
+        genomes = genomes.copy()
+        rows = np.flatnonzero(rng.random(len(genomes)) <= mutate_chance)
+        genes = rng.integers(0, len(self.sizes), size=len(rows))
+        genomes[rows, genes] = rng.integers(0, self.sizes[genes]).astype(self.dtype)
+
+        return genomes
+
+    def evolve(self, genomes, fitness, retain, random_select, mutate_chance, rng):
+        """Evolve a population, keeping its size.
+
+        The fittest genomes survive, along with a few random others, and
+        the rest of the population is refilled with mutated children of
+        survivors. Children have a fitness of zero until they are trained.
+
+        Args:
+            genomes (ndarray): One genome per row
+            fitness (ndarray): Fitness of each genome
+            retain (float): Fraction of the population that survives
+            random_select (float): Probability a rejected genome survives
+            mutate_chance (float): Probability a child is mutated
+            rng (Generator): Source of randomness
+
+        Returns:
+            (tuple): The evolved genomes and their fitness
+
+        """
+        count = len(genomes)
+        order = np.argsort(-fitness, kind='stable')
+        retain_length = int(retain * count)
+
+        lucky = retain_length + np.flatnonzero(rng.random(count - retain_length) <= random_select)
+        survivors = np.concatenate([order[:retain_length], order[lucky]])
+        if len(survivors) < 2:
+            survivors = order[:2]
+
+        # Breed pairs of survivors picked at random until the population is full.
+        needed = count - len(survivors)
+        pairs = (needed + 1) // 2
+        mothers = genomes[survivors[rng.integers(0, len(survivors), size=pairs)]]
+        fathers = genomes[survivors[rng.integers(0, len(survivors), size=pairs)]]
+        children_a, children_b = self.crossover(mothers, fathers, rng)
+        children = self.mutate(np.concatenate([children_a, children_b])[:needed], mutate_chance, rng)
+
+        evolved = np.concatenate([genomes[survivors], children])
+        evolved_fitness = np.concatenate([fitness[survivors], np.zeros(len(children))])
+
+        return evolved, evolved_fitness
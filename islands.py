@@ -0,0 +1,143 @@
+"""
+Island model: several populations evolving side by side.
+
+Each island runs its own genetic algorithm with its own evaluator, so
+islands train on separate worker pools or separate groups of remote
+workers. Every few generations an island sends copies of its best networks
+to its neighbours, which replace their weakest networks with them. The
+islands never wait for each other: migrants are dropped in a queue and
+picked up whenever the receiving island next migrates.
+
+Islands should share one set of scores (see FitnessCache), so a network
+already trained on one island is not trained again on another.
+"""
+import queue
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from network import Network
+from main import generate
+
+def ring(index, count, rng):
+    """Send migrants to the next island along."""
+    return [(index + 1) % count]
+
+def complete(index, count, rng):
+    """Send migrants to every other island."""
+    return [other for other in range(count) if other != index]
+
+def random_neighbour(index, count, rng):
+    """Send migrants to one other island chosen at random each time."""
+    return [rng.choice([other for other in range(count) if other != index])]
+
+# Migration topologies that can be chosen by name.
+TOPOLOGIES = {
+    'ring': ring,
+    'complete': complete,
+    'random': random_neighbour,
+}
+
+class IslandModel():
+    """Evolve one population per evaluator, with migration between them."""
+
+    def __init__(self, evaluators, migration_interval=2, migrants=1, topology='ring'):
+        """Create an island model.
+
+        Args:
+            evaluators (list): One evaluator per island. Islands run in
+                threads of this process, so the evaluators should train
+                in other processes, e.g. ProcessPoolEvaluator or
+                DistributedEvaluator.
+            migration_interval (int): Generations between migrations
+            migrants (int): Best networks each island sends per migration
+            topology (str): 'ring', 'complete' or 'random', or a function
+                taking an island's index, the number of islands and a
+                Random, returning the indices of the islands to send to
+
+        """
+        self.evaluators = evaluators
+        self.migration_interval = migration_interval
+        self.migrants = migrants
+        self.topology = TOPOLOGIES[topology] if isinstance(topology, str) else topology
+        self._inboxes = [queue.Queue() for _ in evaluators]
+
+    def migrate(self, index, generation, networks):
+        """Exchange networks with the neighbouring islands.
+
+        Args:
+            index (int): The island migrating
+            generation (int): Index of the generation just scored
+            networks (list): The island's scored population
+
+        Returns:
+            (list): The population with arrivals in place of its weakest
+                networks
+
+        """
+        if len(self._inboxes) < 2 or (generation + 1) % self.migration_interval:
+            return networks
+
+        networks = sorted(networks, key=lambda x: x.accuracy, reverse=True)
+        emigrants = [(dict(network.network), network.accuracy)
+                     for network in networks[:self.migrants]]
+        rng = random.Random()
+        for destination in self.topology(index, len(self._inboxes), rng):
+            self._inboxes[destination].put(emigrants)
+
+        arrivals = []
+        while True:
+            try:
+                arrivals.extend(self._inboxes[index].get_nowait())
+            except queue.Empty:
+                break
+
+        # Only take networks the island does not have, in place of its worst.
+        present = [network.network for network in networks]
+        replaced = 0
+        for params, accuracy in sorted(arrivals, key=lambda x: x[1], reverse=True):
+            if params in present or replaced >= len(networks) - 1:
+                continue
+            if accuracy <= networks[-1 - replaced].accuracy:
+                continue
+            immigrant = Network(networks[0].nn_param_choices)
+            immigrant.create_set(params)
+            immigrant.accuracy = accuracy
+            networks[-1 - replaced] = immigrant
+            present.append(params)
+            replaced += 1
+
+        if replaced:
+            logging.info("Island %d took %d migrants after generation %d",
+                         index, replaced, generation + 1)
+
+        return networks
+
+    def generate(self, generations, population, nn_param_choices, dataset, **options):
+        """Evolve every island at once.
+
+        Args:
+            generations (int): Number of times to evolve each population
+            population (int): Number of networks on each island
+            nn_param_choices (dict): Parameter choices for networks
+            dataset (str): Dataset to use for training/evaluating
+            options: Further arguments for main.generate, given to every
+                island
+
+        Returns:
+            (list): The final networks of all islands, best first
+
+        """
+        logging.info("***Evolving %d islands***", len(self.evaluators))
+
+        def evolve_island(index):
+            return generate(generations, population, nn_param_choices, dataset,
+                            self.evaluators[index],
+                            migrate=lambda generation, networks:
+                                self.migrate(index, generation, networks),
+                            **options)
+
+        with ThreadPoolExecutor(max_workers=len(self.evaluators)) as executor:
+            populations = list(executor.map(evolve_island, range(len(self.evaluators))))
+
+        return sorted((network for networks in populations for network in networks),
+                      key=lambda x: x.accuracy, reverse=True)
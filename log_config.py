@@ -0,0 +1,87 @@
+"""
+Logging setup for the scripts that run a search.
+
+Nothing is configured at import time; main.py, brute.py and the other
+entry points call setup_logging() from their main(). Messages go to a text
+log and the JSON records from profiling.emit() go to a separate JSON lines
+file, one record per network or generation.
+
+Handlers run on a background thread behind a queue, so logging never
+makes training wait on the disk, and records are only formatted there.
+Libraries such as TensorFlow only log warnings and errors.
+"""
+import os
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener
+
+# Libraries whose routine messages are left out of the logs.
+NOISY_LOGGERS = ('tensorflow', 'absl', 'keras', 'h5py', 'matplotlib', 'PIL', 'urllib3')
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue records without formatting them in the logging thread."""
+
+    def prepare(self, record):
+        # The listener runs in this process, so the record needs no pickling.
+        return record
+
+class _LoggerFilter(logging.Filter):
+    """Pass only the records of one logger, or all but that logger's."""
+
+    def __init__(self, name, exclude=False):
+        super().__init__()
+        self.logger_name = name
+        self.exclude = exclude
+
+    def filter(self, record):
+        return (record.name == self.logger_name) != self.exclude
+
+def _stop(listener):
+    """Flush and stop a listener unless it was already stopped."""
+    if listener._thread is not None:
+        listener.stop()
+
+def setup_logging(log_file='log.txt', metrics_file='metrics.jsonl', level=logging.INFO):
+    """Send log messages and metrics records to their files.
+
+    Args:
+        log_file (str): File for log messages, or None for stderr
+        metrics_file (str): File for the JSON records, or None to drop them
+        level (int): Lowest level of message logged
+
+    Returns:
+        (QueueListener): The running listener, stopped automatically at exit
+
+    """
+    # TensorFlow's C++ logging does not go through the logging module.
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    if log_file is None:
+        messages = logging.StreamHandler()
+    else:
+        messages = logging.FileHandler(log_file)
+    messages.setFormatter(logging.Formatter(
+        fmt='%(asctime)s - %(levelname)s - %(message)s',
+        datefmt='%m/%d/%Y %I:%M:%S %p'))
+    messages.addFilter(_LoggerFilter('metrics', exclude=True))
+    handlers = [messages]
+
+    if metrics_file is not None:
+        metrics = logging.FileHandler(metrics_file)
+        metrics.setFormatter(logging.Formatter('%(message)s'))
+        metrics.addFilter(_LoggerFilter('metrics'))
+        handlers.append(metrics)
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(_stop, listener)
+
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(_DeferredQueueHandler(records))
+
+    return listener
@@ -1,111 +1,397 @@
-"""Entry point to evolving the neural network. Start here."""
-import logging
-from optimizer import Optimizer
-from tqdm import tqdm
-
-# Setup logging.
-logging.basicConfig(
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%m/%d/%Y %I:%M:%S %p',
-    level=logging.DEBUG,
-    filename='log.txt'
-)
-
-def train_networks(networks, dataset):
-    """Train each network.
-
-    Args:
-        networks (list): Current population of networks
-        dataset (str): Dataset to use for training/evaluating
-    """
-    pbar = tqdm(total=len(networks))
-    for network in networks:
-        network.train(dataset)
-        pbar.update(1)
-    pbar.close()
-
-def get_average_accuracy(networks):
-    """Get the average accuracy for a group of networks.
-
-    Args:
-        networks (list): List of networks
-
-    Returns:
-        float: The average accuracy of a population of networks.
-
-    """
-    total_accuracy = 0
-    for network in networks:
-        total_accuracy += network.accuracy
-
-    return total_accuracy / len(networks)
-
-def generate(generations, population, nn_param_choices, dataset):
-    """Generate a network with the genetic algorithm.
-
-    Args:
-        generations (int): Number of times to evolve the population
-        population (int): Number of networks in each generation
-        nn_param_choices (dict): Parameter choices for networks
-        dataset (str): Dataset to use for training/evaluating
-
-    """
-    optimizer = Optimizer(nn_param_choices)
-    networks = optimizer.create_population(population)
-
-    # Evolve the generation.
-    for i in range(generations):
-        logging.info("***Doing generation %d of %d***" %
-                     (i + 1, generations))
-
-        # Train and get accuracy for networks.
-        train_networks(networks, dataset)
-
-        # Get the average accuracy for this generation.
-        average_accuracy = get_average_accuracy(networks)
-
-        # Print out the average accuracy each generation.
-        logging.info("Generation average: %.2f%%" % (average_accuracy * 100))
-        logging.info('-'*80)
-
-        # Evolve, except on the last iteration.
-        if i != generations - 1:
-            # Do the evolution.
-            networks = optimizer.evolve(networks)
-
-    # Sort our final population.
-    networks = sorted(networks, key=lambda x: x.accuracy, reverse=True)
-
-    # Print out the top 5 networks.
-    print_networks(networks[:5])
-
-def print_networks(networks):
-    """Print a list of networks.
-
-    Args:
-        networks (list): The population of networks
-
-    """
-    logging.info('-'*80)
-    for network in networks:
-        network.print_network()
-
-def main():
-    """Evolve a network."""
-    generations = 5  # Number of times to evolve the population.
-    population = 20  # Number of networks in each generation.
-    dataset = 'cifar10'
-
-    nn_param_choices = {
-        'nb_neurons': [64, 128, 256, 512, 768, 1024],
-        'nb_layers': [1, 2, 3, 4],
-        'activation': ['relu', 'elu', 'tanh', 'sigmoid'],
-        'optimizer': ['rmsprop', 'adam', 'sgd', 'adagrad','adadelta', 'adamax', 'nadam'],
-    }
-
-    logging.info("***Evolving %d generations with population %d***" % (generations, population))
-
-    generate(generations, population, nn_param_choices, dataset)
-
-if __name__ == '__main__':
-    main()
+"""Entry point to evolving the neural network. Start here."""
+import os
+import time
+import logging
+from optimizer import Optimizer
+from network import Network
+from datasets import evict_dataset, with_fidelity, split_fidelity
+from evaluator import SerialEvaluator, FusedEvaluator, ProcessPoolEvaluator
+from fitness_cache import FitnessCache
+from fitness_store import FitnessStore
+from surrogate import Surrogate
+from scheduler import SuccessiveHalving
+from distributed import DistributedEvaluator
+from broker import SQLiteBroker
+from budget import budget_for
+from profiling import emit, profile
+from log_config import setup_logging
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, wait
+
+def train_networks(networks, dataset, evaluator=None, budget=None, weights_dir=None):
+    """Train each network.
+
+    Args:
+        networks (list): Current population of networks
+        dataset (str): Dataset to use for training/evaluating
+        evaluator (Evaluator): Evaluator that does the training,
+            defaults to training one network at a time
+        budget (TrainingBudget): Limits on training each network
+        weights_dir (str): Directory of trained weights children inherit
+    """
+    if evaluator is None:
+        evaluator = SerialEvaluator()
+    evaluator.evaluate(networks, dataset, budget, weights_dir)
+
+def get_average_accuracy(networks):
+    """Get the average accuracy for a group of networks.
+
+    Args:
+        networks (list): List of networks
+
+    Returns:
+        float: The average accuracy of a population of networks.
+
+    """
+    total_accuracy = 0
+    for network in networks:
+        total_accuracy += network.accuracy
+
+    return total_accuracy / len(networks)
+
+def fidelity_for(fidelity, generation):
+    """Return the fraction of the data a generation trains on.
+
+    Args:
+        fidelity (float or list): A fraction for every generation, or one
+            per generation with the last repeating, or None for all data
+        generation (int): Index of the generation
+
+    """
+    if fidelity is None:
+        return 1.
+    if isinstance(fidelity, (int, float)):
+        return float(fidelity)
+
+    return float(fidelity[min(generation, len(fidelity) - 1)])
+
+def generate(generations, population, nn_param_choices, dataset, evaluator=None,
+             time_budget=None, network_timeout=None, profile_generation=None,
+             surrogate=None, weights_dir=None, fidelity=None, migrate=None,
+             backend='keras'):
+    """Generate a network with the genetic algorithm.
+
+    If the evaluator has a FitnessStore holding a completed generation for
+    this dataset, the run carries on from that generation.
+
+    Args:
+        generations (int): Number of times to evolve the population
+        population (int): Number of networks in each generation
+        nn_param_choices (dict): Parameter choices for networks
+        dataset (str): Dataset to use for training/evaluating
+        evaluator (Evaluator): Evaluator that trains each
+            generation, defaults to training one network at a time
+        time_budget (float): Seconds after which no new generation is
+            started, or None to run every generation
+        network_timeout (float): Seconds any one network may train for
+            before it is stopped and its fitness penalized
+        profile_generation (int): Index of a generation to run under
+            cProfile and tracemalloc, or None to profile nothing
+        surrogate (Surrogate): Model used to pre-screen children so
+            only the most promising ones are trained
+        weights_dir (str): Directory to keep trained weights in, so
+            children start from their parent's weights instead of
+            random ones
+        fidelity (float or list): Fraction of the training and test data
+            each generation uses, e.g. [0.1, 0.3, 1.] to screen the first
+            generations cheaply on stratified samples. A list gives one
+            fraction per generation and its last value repeats. When the
+            fraction changes, surviving networks are scored again so the
+            whole population is compared on the same data.
+        migrate (callable): Called with the generation index and the
+            scored population before it evolves, returning the population
+            to evolve, e.g. with migrants from other islands mixed in
+        backend (str): What trains the networks when no evaluator is
+            given, 'keras' or 'numpy' for a fast proxy without TensorFlow
+
+    Returns:
+        (list): The final population, best network first
+
+    """
+    start_time = time.monotonic()
+    if evaluator is None:
+        evaluator = SerialEvaluator(backend=backend)
+    cache = evaluator.cache
+
+    budget = evaluator.budget
+    if network_timeout is not None:
+        budget = (budget or budget_for(dataset)).replace(max_seconds=network_timeout)
+
+    optimizer = Optimizer(nn_param_choices, surrogate=surrogate)
+    networks = optimizer.create_population(population)
+    if evaluator.store is not None:
+        # Never breed a network an earlier run already trained.
+        optimizer.remember(record['network'] for record in evaluator.store.records.values()
+                           if split_fidelity(record['dataset'])[0] == dataset)
+    start = 0
+    scored_fidelity = fidelity_for(fidelity, 0)
+
+    # Resume from the last completed generation of an earlier run.
+    checkpoint = evaluator.store.last_generation(dataset) if evaluator.store else None
+    if checkpoint is not None:
+        networks = restore_population(checkpoint['population'], nn_param_choices)
+        start = checkpoint['generation'] + 1
+        scored_fidelity = fidelity_for(fidelity, checkpoint['generation'])
+        logging.info("***Resuming after generation %d***", start)
+        if start < generations:
+            networks = optimizer.evolve(networks)
+
+    # Evolve the generation.
+    for i in range(start, generations):
+        logging.info("***Doing generation %d of %d***",
+                     i + 1, generations)
+
+        # Scores on other data can't be compared with the new children's.
+        generation_fidelity = fidelity_for(fidelity, i)
+        if generation_fidelity != scored_fidelity:
+            logging.info("***Fidelity %.2f, rescoring survivors***", generation_fidelity)
+            for network in networks:
+                network.accuracy = 0.
+            scored_fidelity = generation_fidelity
+
+        # Train and get accuracy for networks.
+        cache.reset_counts()
+        generation_start = time.monotonic()
+        profiler = nullcontext()
+        if i == profile_generation:
+            profiler = profile('profile-generation-%d.prof' % i, trace_memory=True)
+        with profiler:
+            train_networks(networks, with_fidelity(dataset, generation_fidelity),
+                           evaluator, budget, weights_dir)
+        logging.info("Fitness cache: %d hits, %d misses",
+                     cache.hits, cache.misses)
+
+        if evaluator.store is not None:
+            evaluator.store.record_generation(i, networks, dataset)
+
+        # Get the average accuracy for this generation.
+        average_accuracy = get_average_accuracy(networks)
+
+        # Print out the average accuracy each generation.
+        logging.info("Generation average: %.2f%%", average_accuracy * 100)
+        logging.info('-'*80)
+        emit('generation', generation=i, dataset=dataset, fidelity=generation_fidelity,
+             size=len(networks),
+             average_accuracy=average_accuracy,
+             best_accuracy=max(network.accuracy for network in networks),
+             seconds=time.monotonic() - generation_start,
+             cache_hits=cache.hits, cache_misses=cache.misses)
+
+        # Stop early once the time budget is spent.
+        if time_budget is not None and time.monotonic() - start_time >= time_budget:
+            logging.info("***Time budget spent after generation %d***", i + 1)
+            break
+
+        if migrate is not None:
+            networks = migrate(i, networks)
+
+        # Evolve, except on the last iteration.
+        if i != generations - 1:
+            # Do the evolution.
+            networks = optimizer.evolve(networks)
+
+    # Training is done, release the dataset.
+    evict_dataset(dataset)
+
+    # Sort our final population.
+    networks = sorted(networks, key=lambda x: x.accuracy, reverse=True)
+
+    # Print out the top 5 networks.
+    print_networks(networks[:5])
+
+    return networks
+
+def generate_steady_state(evaluations, population, nn_param_choices, dataset,
+                          evaluator=None, time_budget=None, network_timeout=None,
+                          concurrency=None, weights_dir=None, backend='keras'):
+    """Evolve networks asynchronously, without waiting for whole generations.
+
+    As soon as any network finishes training it joins the population,
+    replacing the weakest network once the population is full, and a new
+    child is bred and dispatched in its place. This keeps every worker busy
+    instead of waiting on the slowest network of each generation.
+
+    Args:
+        evaluations (int): Number of networks to train in total
+        population (int): Number of networks kept in the population
+        nn_param_choices (dict): Parameter choices for networks
+        dataset (str): Dataset to use for training/evaluating
+        evaluator (Evaluator): Evaluator that trains the networks,
+            defaults to training one network at a time
+        time_budget (float): Seconds after which no new network is
+            dispatched, or None to train every network
+        network_timeout (float): Seconds any one network may train for
+            before it is stopped and its fitness penalized
+        concurrency (int): Networks training at once, defaults to the
+            evaluator's number of workers
+        weights_dir (str): Directory to keep trained weights in, so
+            children start from their parent's weights
+        backend (str): What trains the networks when no evaluator is
+            given, 'keras' or 'numpy'
+
+    Returns:
+        (list): The final population, best network first
+
+    """
+    start_time = time.monotonic()
+    if evaluator is None:
+        evaluator = SerialEvaluator(backend=backend)
+    if concurrency is None:
+        concurrency = getattr(evaluator, 'workers', 1)
+
+    budget = evaluator.budget
+    if network_timeout is not None:
+        budget = (budget or budget_for(dataset)).replace(max_seconds=network_timeout)
+
+    optimizer = Optimizer(nn_param_choices)
+    initial = optimizer.create_population(population)
+    networks = []
+    running = {}
+    dispatched = 0
+
+    def dispatch():
+        nonlocal dispatched
+        # Train the random initial networks first, then bred children.
+        if initial or len(networks) < 2:
+            network = initial.pop() if initial else optimizer.create_population(1)[0]
+        else:
+            network = optimizer.reproduce(networks)
+        running[evaluator.submit(network, dataset, budget, weights_dir)] = network
+        dispatched += 1
+
+    logging.info("***Evolving %d networks asynchronously***", evaluations)
+    while dispatched < min(concurrency, evaluations):
+        dispatch()
+
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            network = running.pop(future)
+            evaluator.finish(network, dataset, future.result())
+
+            # Steady-state replacement: the weakest network drops out.
+            networks = sorted(networks + [network], key=lambda x: x.accuracy,
+                              reverse=True)[:population]
+
+            out_of_time = time_budget is not None and time.monotonic() - start_time >= time_budget
+            if dispatched < evaluations and not out_of_time:
+                dispatch()
+
+    logging.info("***Trained %d networks, average accuracy %.2f%%***",
+                 dispatched, get_average_accuracy(networks) * 100)
+
+    # Print out the top 5 networks.
+    print_networks(networks[:5])
+
+    return networks
+
+def restore_population(population, nn_param_choices):
+    """Rebuild scored networks from a stored generation.
+
+    Args:
+        population (list): Dicts of network parameters and accuracy
+        nn_param_choices (dict): Parameter choices for networks
+
+    Returns:
+        (list): The population of network objects
+
+    """
+    networks = []
+    for member in population:
+        network = Network(nn_param_choices)
+        network.create_set(member['network'])
+        network.accuracy = member['accuracy']
+        networks.append(network)
+
+    return networks
+
+def print_networks(networks):
+    """Print a list of networks.
+
+    Args:
+        networks (list): The population of networks
+
+    """
+    logging.info('-'*80)
+    for network in networks:
+        network.print_network()
+
+def main():
+    """Evolve a network."""
+    setup_logging('log.txt', 'metrics.jsonl')
+
+    generations = 5  # Number of times to evolve the population.
+    population = 20  # Number of networks in each generation.
+    dataset = 'cifar10'
+    workers = 4  # Number of networks to train at once.
+    backend = 'keras'  # Or 'numpy' to screen networks quickly without TensorFlow.
+    suffix = '' if backend == 'keras' else '-' + backend  # Backends keep separate scores.
+    store = FitnessStore('fitness%s.jsonl' % suffix)  # Scores kept across restarts.
+    data_dir = 'data'  # Preprocessed datasets shared by the workers.
+    rungs = (3, 10, 100)  # Epoch budgets for successive halving.
+    weights_dir = None  # Or e.g. 'weights' for children to inherit; holds every network's weights.
+    fidelity = None  # Data fraction per generation, e.g. [0.1, 0.3, 1.], or None for all.
+    steady_state = False  # Evolve asynchronously instead of by generation.
+    broker = None  # Path of a SQLite task queue to train on worker.py processes.
+    fused = False  # Train small Keras networks side by side in this process instead.
+    islands = None  # Number of populations evolving side by side, or None for one.
+    time_budget = 8 * 60 * 60  # Seconds before no new generation starts.
+    network_timeout = 30 * 60  # Seconds any one network may train for.
+
+    # Set GA_PROFILE_GENERATION to profile one generation, e.g. 0 for the first.
+    profile_generation = os.environ.get('GA_PROFILE_GENERATION')
+    if profile_generation is not None:
+        profile_generation = int(profile_generation)
+
+    nn_param_choices = {
+        'nb_neurons': [64, 128, 256, 512, 768, 1024],
+        'nb_layers': [1, 2, 3, 4],
+        'activation': ['relu', 'elu', 'tanh', 'sigmoid'],
+        'optimizer': ['rmsprop', 'adam', 'sgd', 'adagrad','adadelta', 'adamax', 'nadam'],
+    }
+
+    logging.info("***Evolving %d generations with population %d***", generations, population)
+
+    if islands:
+        from islands import IslandModel
+
+        # Each island gets its share of the workers; all share their scores.
+        scores = {}
+        evaluators = [SuccessiveHalving(
+            ProcessPoolEvaluator(workers=max(1, workers // islands), cache=FitnessCache(scores),
+                                 store=FitnessStore('fitness%s-island%d.jsonl' % (suffix, i)),
+                                 data_dir=data_dir, backend=backend),
+            rungs=rungs, checkpoint_dir=os.path.join('checkpoints', 'island%d' % i))
+            for i in range(islands)]
+        try:
+            IslandModel(evaluators).generate(
+                generations, population // islands, nn_param_choices, dataset,
+                time_budget=time_budget, network_timeout=network_timeout,
+                weights_dir=weights_dir, fidelity=fidelity)
+        finally:
+            for evaluator in evaluators:
+                evaluator.close()
+        return
+
+    if broker is not None:
+        pool = DistributedEvaluator(SQLiteBroker(broker), workers=workers, store=store,
+                                    backend=backend)
+    elif fused:
+        pool = FusedEvaluator(store=store, backend=backend)
+    else:
+        pool = ProcessPoolEvaluator(workers=workers, store=store, data_dir=data_dir,
+                                    backend=backend)
+    if steady_state:
+        # Each network is trained in full as soon as it is bred.
+        with pool as evaluator:
+            generate_steady_state(generations * population, population, nn_param_choices,
+                                  dataset, evaluator, time_budget, network_timeout,
+                                  weights_dir=weights_dir)
+    else:
+        with SuccessiveHalving(pool, rungs=rungs) as evaluator:
+            generate(generations, population, nn_param_choices, dataset, evaluator,
+                     time_budget, network_timeout, profile_generation,
+                     Surrogate(nn_param_choices), weights_dir, fidelity)
+
+if __name__ == '__main__':
+    main()
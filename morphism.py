@@ -0,0 +1,163 @@
+"""
+Warm-start a network from the trained weights of its parent.
+
+Weights are handled as the flat list returned by a Keras model's
+get_weights(): a kernel and a bias for each hidden layer, then the output
+layer's kernel and bias. A parent's weights are reshaped to fit a child
+with a different width or depth in the style of Net2Net:
+
+- Wider layers copy randomly chosen existing units and split each copied
+  unit's outgoing weights between its copies, so the network still
+  computes the same function.
+- Extra layers start as the identity, which preserves the function for
+  relu and elu inputs that are already non-negative.
+- Narrower or shallower networks keep the strongest units and the first
+  layers. This loses the function, but still trains faster than random
+  initialization.
+
+Both training backends keep checkpoints and inheritable weights under the
+names given by checkpoint_path() and weights_path(), so a child can
+inherit weights from a parent trained by either backend.
+"""
+import os
+import numpy as np
+from datasets import split_fidelity
+from fitness_cache import genome_key
+
+def save_weights(path, weights):
+    """Save a list of weight arrays."""
+    np.savez(path, *weights)
+
+def load_weights(path):
+    """Load a list of weight arrays written by save_weights()."""
+    with np.load(path) as arrays:
+        return [arrays['arr_%d' % i] for i in range(len(arrays.files))]
+
+def checkpoint_path(checkpoint_dir, network, dataset, extension):
+    """Return where a network is saved between rounds of training.
+
+    Args:
+        checkpoint_dir (str): Directory of checkpoints
+        network (dict): The network parameters
+        dataset (str): Dataset the network trains on
+        extension (str): The backend's file extension, e.g. '.keras'
+
+    """
+    return os.path.join(checkpoint_dir, genome_key(network, dataset) + extension)
+
+def weights_path(weights_dir, network, dataset):
+    """Return where a network's trained weights are kept for its children.
+
+    Weights are shared across fidelities, since they are only a starting
+    point for training.
+    """
+    return os.path.join(weights_dir, genome_key(network, split_fidelity(dataset)[0]) + '.npz')
+
+def keep_weights(weights_dir, network, dataset, weights):
+    """Save a trained network's weights for its children to inherit."""
+    os.makedirs(weights_dir, exist_ok=True)
+    save_weights(weights_path(weights_dir, network, dataset), weights)
+
+def inherited_weights(network, dataset, weights_dir=None, parents=None, rng=None):
+    """Return a network's starting weights fitted from its parent's.
+
+    Args:
+        network (dict): The network parameters
+        dataset (str): Dataset the network trains on
+        weights_dir (str): Directory of kept weights, or None
+        parents (dict): Parameters of the network each network was bred
+            from, keyed by genome key
+        rng (Generator): Source of randomness for the copied units
+
+    Returns:
+        (list): Weights to start from, or None if the parent's weights are
+            not available
+
+    """
+    parent = (parents or {}).get(genome_key(network, dataset))
+    if weights_dir is None or parent is None:
+        return None
+
+    path = weights_path(weights_dir, parent, dataset)
+    if not os.path.exists(path):
+        return None
+
+    return morph(load_weights(path), network, rng)
+
+def _layers(weights):
+    """Pair up a flat list of weights into (kernel, bias) per layer."""
+    return [(weights[i], weights[i + 1]) for i in range(0, len(weights), 2)]
+
+def widen(weights, nb_neurons, rng=None):
+    """Resize every hidden layer to nb_neurons units.
+
+    Args:
+        weights (list): Kernel and bias of each hidden layer, then the
+            output layer
+        nb_neurons (int): Units per hidden layer in the child
+        rng (Generator): Source of randomness for the copied units
+
+    Returns:
+        (list): Weights in the same layout, resized
+
+    """
+    rng = rng or np.random.default_rng()
+    layers = _layers(weights)
+
+    for i in range(len(layers) - 1):
+        kernel, bias = layers[i]
+        next_kernel, next_bias = layers[i + 1]
+        units = kernel.shape[1]
+
+        if nb_neurons > units:
+            mapping = np.concatenate([np.arange(units),
+                                      rng.integers(0, units, nb_neurons - units)])
+            # Each copy of a unit passes on an equal share of its output.
+            copies = np.bincount(mapping, minlength=units)
+            kernel, bias = kernel[:, mapping], bias[mapping]
+            next_kernel = next_kernel[mapping] / copies[mapping][:, None]
+        elif nb_neurons < units:
+            strongest = np.argsort(-np.linalg.norm(next_kernel, axis=1))[:nb_neurons]
+            keep = np.sort(strongest)
+            kernel, bias, next_kernel = kernel[:, keep], bias[keep], next_kernel[keep]
+
+        layers[i] = (kernel, bias)
+        layers[i + 1] = (next_kernel.astype(kernel.dtype), next_bias)
+
+    return [array for layer in layers for array in layer]
+
+def deepen(weights, nb_layers):
+    """Change the number of hidden layers to nb_layers.
+
+    Args:
+        weights (list): Kernel and bias of each hidden layer, then the
+            output layer
+        nb_layers (int): Hidden layers in the child
+
+    Returns:
+        (list): Weights in the same layout, with layers added or removed
+
+    """
+    layers = _layers(weights)
+    hidden, output = layers[:-1][:nb_layers], layers[-1]
+
+    while len(hidden) < nb_layers:
+        kernel = hidden[-1][0]
+        width = kernel.shape[1]
+        hidden.append((np.eye(width, dtype=kernel.dtype), np.zeros(width, dtype=kernel.dtype)))
+
+    return [array for layer in hidden + [output] for array in layer]
+
+def morph(weights, network, rng=None):
+    """Fit a parent's weights to a child network.
+
+    Args:
+        weights (list): The parent's weights, as from get_weights()
+        network (dict): The child's network parameters
+        rng (Generator): Source of randomness for the copied units
+
+    Returns:
+        (list): Weights to pass to the child's set_weights()
+
+    """
+    return deepen(widen(weights, network['nb_neurons'], rng), network['nb_layers'])
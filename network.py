@@ -1,7 +1,7 @@
 """Class that represents the network to be evolved."""
 import random
 import logging
-from train import train_and_score
+from evaluator import SerialEvaluator
 
 class Network():
     """Represent a network and let us operate on it.
@@ -22,6 +22,7 @@ class Network():
         self.accuracy = 0.
         self.nn_param_choices = nn_param_choices
         self.network = {}  # (dic): represents MLP network parameters
+        self.parent = None  # (dict): parameters of the network this one was bred from
 
     def create_random(self):
         """Create a random network."""
@@ -39,17 +40,22 @@ class Network():
 
         
 
-    def train(self, dataset):
+    def train(self, dataset, cache=None, backend='keras'):
         """Train the network and record the accuracy.
 
+        The network is scored by a SerialEvaluator, exactly as it would be
+        as part of a population.
+
         Args:
             dataset (str): Name of dataset to use.
+            cache (FitnessCache): Accuracies of networks already scored,
+                consulted before training and updated afterwards
+            backend (str): What trains the network, 'keras' or 'numpy'
 
         """
-        if self.accuracy == 0.:
-            self.accuracy = train_and_score(self.network, dataset)
+        SerialEvaluator(cache, backend=backend).evaluate([self], dataset)
 
     def print_network(self):
         """Print out a network."""
         logging.info(self.network)
-        logging.info("Network accuracy: %.2f%%" % (self.accuracy * 100))
+        logging.info("Network accuracy: %.2f%%", self.accuracy * 100)
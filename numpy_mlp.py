@@ -0,0 +1,432 @@
+"""
+Train networks as plain NumPy MLPs, without TensorFlow.
+
+The networks match the ones train.py builds with Keras: nb_layers dense
+layers of nb_neurons units with the chosen activation, each followed by
+20% dropout, and a softmax output, trained on categorical cross-entropy
+by the chosen optimizer with Keras' default settings. Training a small
+network this way takes a fraction of the time Keras needs to start, so
+this backend serves as a cheap proxy fitness for screening many
+architectures on plain CPUs, and for tests and benchmarks that should not
+need TensorFlow.
+
+Scores from the two backends are close but not equal, so each backend
+should keep its own FitnessStore. Weights use the layout of a Keras
+model's get_weights(), so a network trained here can pass its weights on
+to a child trained with Keras and the other way round. Checkpoints only
+hold the weights, so a network resumed by successive halving starts its
+optimizer afresh.
+"""
+import os
+import time
+import numpy as np
+from datasets import load_dataset, is_sharded, split_fidelity, stratified_subset
+from morphism import save_weights, load_weights, checkpoint_path, inherited_weights, \
+    keep_weights
+from budget import budget_for
+from profiling import PhaseTimer, peak_rss_mb, rss_mb
+
+# Fraction of units dropped after each hidden layer, as in train.build_model().
+DROPOUT = 0.2
+
+# Smallest probability used in the cross-entropy, as in Keras.
+EPSILON = 1e-7
+
+def _elu(z):
+    return np.where(z > 0, z, np.expm1(np.minimum(z, 0)))
+
+def _sigmoid(z):
+    # Written with tanh so large inputs do not overflow.
+    return 0.5 * (1 + np.tanh(0.5 * z))
+
+# Each activation, and its derivative given the layer's input and output.
+ACTIVATIONS = {
+    'relu': (lambda z: np.maximum(z, 0), lambda z, a: (z > 0).astype(z.dtype)),
+    'elu': (_elu, lambda z, a: np.where(z > 0, 1, a + 1).astype(z.dtype)),
+    'tanh': (np.tanh, lambda z, a: 1 - a * a),
+    'sigmoid': (_sigmoid, lambda z, a: a * (1 - a)),
+    'linear': (lambda z: z, lambda z, a: np.ones_like(z)),
+}
+
+def _sgd(weight, gradient, state, step, learning_rate=0.01):
+    weight -= learning_rate * gradient
+
+def _rmsprop(weight, gradient, state, step, learning_rate=0.001, rho=0.9, epsilon=1e-7):
+    velocity = state.setdefault('velocity', np.zeros_like(weight))
+    velocity *= rho
+    velocity += (1 - rho) * gradient ** 2
+    weight -= learning_rate * gradient / np.sqrt(velocity + epsilon)
+
+def _adam(weight, gradient, state, step, learning_rate=0.001, beta_1=0.9, beta_2=0.999,
+          epsilon=1e-7):
+    momentum = state.setdefault('momentum', np.zeros_like(weight))
+    velocity = state.setdefault('velocity', np.zeros_like(weight))
+    momentum += (1 - beta_1) * (gradient - momentum)
+    velocity += (1 - beta_2) * (gradient ** 2 - velocity)
+    alpha = learning_rate * np.sqrt(1 - beta_2 ** step) / (1 - beta_1 ** step)
+    weight -= alpha * momentum / (np.sqrt(velocity) + epsilon)
+
+def _adagrad(weight, gradient, state, step, learning_rate=0.001,
+             initial_accumulator_value=0.1, epsilon=1e-7):
+    accumulator = state.setdefault('accumulator',
+                                   np.full_like(weight, initial_accumulator_value))
+    accumulator += gradient ** 2
+    weight -= learning_rate * gradient / np.sqrt(accumulator + epsilon)
+
+def _adadelta(weight, gradient, state, step, learning_rate=0.001, rho=0.95, epsilon=1e-7):
+    accumulated_gradient = state.setdefault('gradient', np.zeros_like(weight))
+    accumulated_delta = state.setdefault('delta', np.zeros_like(weight))
+    accumulated_gradient *= rho
+    accumulated_gradient += (1 - rho) * gradient ** 2
+    delta = gradient * np.sqrt(accumulated_delta + epsilon) / np.sqrt(accumulated_gradient + epsilon)
+    accumulated_delta *= rho
+    accumulated_delta += (1 - rho) * delta ** 2
+    weight -= learning_rate * delta
+
+def _adamax(weight, gradient, state, step, learning_rate=0.001, beta_1=0.9, beta_2=0.999,
+            epsilon=1e-7):
+    momentum = state.setdefault('momentum', np.zeros_like(weight))
+    norm = state.setdefault('norm', np.zeros_like(weight))
+    momentum += (1 - beta_1) * (gradient - momentum)
+    np.maximum(beta_2 * norm, np.abs(gradient), out=norm)
+    weight -= learning_rate / (1 - beta_1 ** step) * momentum / (norm + epsilon)
+
+def _nadam(weight, gradient, state, step, learning_rate=0.001, beta_1=0.9, beta_2=0.999,
+           epsilon=1e-7):
+    momentum = state.setdefault('momentum', np.zeros_like(weight))
+    velocity = state.setdefault('velocity', np.zeros_like(weight))
+    momentum += (1 - beta_1) * (gradient - momentum)
+    velocity += (1 - beta_2) * (gradient ** 2 - velocity)
+    # Adam with the momentum looking one step ahead.
+    momentum_hat = (beta_1 * momentum / (1 - beta_1 ** (step + 1)) +
+                    (1 - beta_1) * gradient / (1 - beta_1 ** step))
+    velocity_hat = velocity / (1 - beta_2 ** step)
+    weight -= learning_rate * momentum_hat / (np.sqrt(velocity_hat) + epsilon)
+
+# Update rule of each optimizer, applied to one weight array in place.
+OPTIMIZERS = {
+    'sgd': _sgd,
+    'rmsprop': _rmsprop,
+    'adam': _adam,
+    'adagrad': _adagrad,
+    'adadelta': _adadelta,
+    'adamax': _adamax,
+    'nadam': _nadam,
+}
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def _metrics(probabilities, y):
+    """Return the summed cross-entropy and number of correct predictions."""
+    loss = -np.sum(y * np.log(np.clip(probabilities, EPSILON, 1 - EPSILON)))
+    correct = np.sum(probabilities.argmax(axis=1) == y.argmax(axis=1))
+    return float(loss), int(correct)
+
+def init_weights(network, nb_inputs, nb_classes, rng):
+    """Create Glorot uniform kernels and zero biases, as Keras does.
+
+    Args:
+        network (dict): the parameters of the network
+        nb_inputs (int): Features per example
+        nb_classes (int): Number of output classes
+        rng (Generator): Source of randomness
+
+    Returns:
+        (list): Kernel and bias of each hidden layer, then the output layer
+
+    """
+    sizes = [nb_inputs] + [network['nb_neurons']] * network['nb_layers'] + [nb_classes]
+    weights = []
+    for fan_in, fan_out in zip(sizes, sizes[1:]):
+        limit = np.sqrt(6 / (fan_in + fan_out))
+        weights.append(rng.uniform(-limit, limit, (fan_in, fan_out)).astype('float32'))
+        weights.append(np.zeros(fan_out, dtype='float32'))
+
+    return weights
+
+class MLP():
+    """A multilayer perceptron with its weights held as NumPy arrays."""
+
+    def __init__(self, weights, activation, optimizer, dropout=DROPOUT, rng=None):
+        """Create an MLP.
+
+        Args:
+            weights (list): Kernel and bias of each hidden layer, then the
+                output layer. They are updated in place by train_batch().
+            activation (str): Activation of the hidden layers, one of
+                ACTIVATIONS
+            optimizer (str): Optimizer, one of OPTIMIZERS
+            dropout (float): Fraction of hidden units dropped in training
+            rng (Generator): Source of randomness for the dropout
+
+        """
+        if activation not in ACTIVATIONS:
+            raise ValueError("Unknown activation %r, expected one of %s" %
+                             (activation, sorted(ACTIVATIONS)))
+        if optimizer not in OPTIMIZERS:
+            raise ValueError("Unknown optimizer %r, expected one of %s" %
+                             (optimizer, sorted(OPTIMIZERS)))
+
+        self.weights = weights
+        self.activation, self.derivative = ACTIVATIONS[activation]
+        self.update = OPTIMIZERS[optimizer]
+        self.dropout = dropout
+        self.rng = rng or np.random.default_rng()
+        self.states = [{} for _ in weights]  # (list): optimizer state of each weight
+        self.iterations = 0
+
+    def predict(self, x):
+        """Return the class probabilities for a batch."""
+        for i in range(0, len(self.weights) - 2, 2):
+            x = self.activation(x @ self.weights[i] + self.weights[i + 1])
+        return _softmax(x @ self.weights[-2] + self.weights[-1])
+
+    def gradients(self, x, y):
+        """Run a training batch forward and backward.
+
+        Args:
+            x (ndarray): Inputs, one example per row
+            y (ndarray): One-hot targets
+
+        Returns:
+            (tuple): The summed loss, the number of correct predictions and
+                the gradient of the mean loss for each weight
+
+        """
+        # Keep each layer's input, its pre-activation and its dropout mask.
+        inputs, linear, outputs, masks = [], [], [], []
+        for i in range(0, len(self.weights) - 2, 2):
+            inputs.append(x)
+            z = x @ self.weights[i] + self.weights[i + 1]
+            a = self.activation(z)
+            linear.append(z)
+            outputs.append(a)
+            mask = (self.rng.random(a.shape, dtype=a.dtype) >= self.dropout) / (1 - self.dropout)
+            masks.append(mask.astype(a.dtype))
+            x = a * masks[-1]
+        inputs.append(x)
+
+        probabilities = _softmax(x @ self.weights[-2] + self.weights[-1])
+        loss, correct = _metrics(probabilities, y)
+
+        gradients = [None] * len(self.weights)
+        delta = (probabilities - y) / len(y)
+        for layer in reversed(range(len(inputs))):
+            gradients[2 * layer] = inputs[layer].T @ delta
+            gradients[2 * layer + 1] = delta.sum(axis=0)
+            if layer:
+                delta = delta @ self.weights[2 * layer].T
+                delta *= masks[layer - 1]
+                delta *= self.derivative(linear[layer - 1], outputs[layer - 1])
+
+        return loss, correct, gradients
+
+    def train_batch(self, x, y):
+        """Take one optimizer step on a batch.
+
+        Returns:
+            (tuple): The summed loss and the number of correct predictions
+
+        """
+        loss, correct, gradients = self.gradients(x, y)
+        self.iterations += 1
+        for weight, gradient, state in zip(self.weights, gradients, self.states):
+            self.update(weight, gradient, state, self.iterations)
+
+        return loss, correct
+
+    def evaluate(self, x, y, rows, batch_size):
+        """Return the mean loss and the accuracy on some examples.
+
+        Args:
+            x (ndarray): Inputs of the whole split
+            y (ndarray): One-hot targets of the whole split
+            rows (ndarray): Indices of the examples to score
+            batch_size (int): Examples scored at once
+
+        """
+        loss = correct = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            batch_loss, batch_correct = _metrics(
+                self.predict(np.asarray(x[batch], dtype='float32')), y[batch])
+            loss += batch_loss
+            correct += batch_correct
+
+        return loss / len(rows), correct / len(rows)
+
+def load_arrays(dataset):
+    """Load a dataset, with its inputs flattened, at the fidelity in its name.
+
+    Args:
+        dataset (str): Dataset to use for training/evaluating, optionally
+            at a reduced fidelity
+
+    Returns:
+        (tuple): nb_classes, batch_size, then the inputs, targets and
+            indices of the examples used for each of the training and test
+            splits
+
+    """
+    dataset, fidelity = split_fidelity(dataset)
+    if is_sharded(dataset):
+        raise ValueError("The NumPy backend cannot stream sharded dataset %r, "
+                         "use the Keras backend" % dataset)
+
+    nb_classes, batch_size, input_shape, x_train, x_test, y_train, y_test = \
+        load_dataset(dataset)
+    x_train = x_train.reshape(len(x_train), -1)
+    x_test = x_test.reshape(len(x_test), -1)
+
+    if fidelity < 1.:
+        train_rows = stratified_subset(y_train, fidelity)
+        test_rows = stratified_subset(y_test, fidelity)
+    else:
+        train_rows = np.arange(len(x_train))
+        test_rows = np.arange(len(x_test))
+
+    return nb_classes, batch_size, x_train, y_train, train_rows, x_test, y_test, test_rows
+
+def prepare_weights(network, dataset, nb_inputs, nb_classes, timer, rng, initial_epoch=0,
+                    checkpoint_dir=None, weights_dir=None, parents=None):
+    """Create the weights a network starts training from.
+
+    The weights are restored from the network's checkpoint when resuming,
+    fitted from its parent's weights when they are available, and are
+    otherwise new. Arguments are as for train_and_evaluate().
+
+    Returns:
+        (tuple): The weights, the epoch to start training from and whether
+            the weights were inherited from a parent
+
+    """
+    if initial_epoch and checkpoint_dir is not None:
+        checkpoint = checkpoint_path(checkpoint_dir, network, dataset, '.npz')
+        if os.path.exists(checkpoint):
+            with timer.phase('restore'):
+                return load_weights(checkpoint), initial_epoch, False
+
+    with timer.phase('inherit'):
+        weights = inherited_weights(network, dataset, weights_dir, parents, rng)
+    if weights is not None:
+        return [weight.astype('float32') for weight in weights], 0, True
+
+    with timer.phase('init'):
+        return init_weights(network, nb_inputs, nb_classes, rng), 0, False
+
+def train_and_evaluate(network, dataset, budget=None, initial_epoch=0,
+                       checkpoint_dir=None, weights_dir=None, parents=None):
+    """Train the network as a NumPy MLP and return its test scores.
+
+    Takes the same arguments and returns the same scores as
+    train.train_and_evaluate(), so the two are interchangeable.
+
+    Args:
+        network (dict): the parameters of the network
+        dataset (str): Dataset to use for training/evaluating
+        budget (TrainingBudget): Limits on training, defaults to the
+            dataset's budget
+        initial_epoch (int): Epoch to resume training from
+        checkpoint_dir (str): Directory to save the trained weights in,
+            and to load them from when resuming
+        weights_dir (str): Directory to save the trained weights in, for
+            children to inherit, and to load the parent's weights from
+        parents (dict): Parameters of the network each network was bred
+            from, keyed by genome key
+
+    Returns:
+        (dict): accuracy and loss on the test set, the total number of
+            epochs trained and the number run by this call, the wall time
+            in seconds, the time spent in each phase, the current and the
+            lifetime peak resident memory of the process in megabytes,
+            whether training hit the time limit and whether the weights
+            were inherited from a parent
+
+    """
+    start = time.time()
+    timer = PhaseTimer()
+    if budget is None:
+        budget = budget_for(dataset)
+    rng = np.random.default_rng()
+
+    with timer.phase('load'):
+        nb_classes, default_batch_size, x_train, y_train, train_rows, \
+            x_test, y_test, test_rows = load_arrays(dataset)
+    batch_size = network.get('batch_size') or budget.batch_size or default_batch_size
+
+    weights, initial_epoch, inherited = prepare_weights(
+        network, dataset, x_train.shape[1], nb_classes, timer, rng, initial_epoch,
+        checkpoint_dir, weights_dir, parents)
+    model = MLP(weights, network['activation'], network['optimizer'], rng=rng)
+
+    # Early stopping as in Keras: accuracies should rise, anything else fall.
+    sign = -1 if 'acc' in budget.monitor else 1
+    best = np.inf
+    best_weights = None
+    wait = 0
+    epochs_run = 0
+    timed_out = False
+    deadline = None
+    if budget.max_seconds is not None:
+        deadline = time.monotonic() + budget.max_seconds
+
+    with timer.phase('fit'):
+        for epoch in range(initial_epoch, budget.max_epochs):
+            order = rng.permutation(train_rows)
+            loss = correct = 0
+            for batch_start in range(0, len(order), batch_size):
+                # Sorted rows read memory-mapped arrays front to back.
+                batch = np.sort(order[batch_start:batch_start + batch_size])
+                batch_loss, batch_correct = model.train_batch(
+                    np.asarray(x_train[batch], dtype='float32'), y_train[batch])
+                loss += batch_loss
+                correct += batch_correct
+                if deadline is not None and time.monotonic() >= deadline:
+                    timed_out = True
+                    break
+            epochs_run += 1
+
+            val_loss, val_accuracy = model.evaluate(x_test, y_test, test_rows, batch_size)
+            logs = {'loss': loss / len(order), 'accuracy': correct / len(order),
+                    'val_loss': val_loss, 'val_accuracy': val_accuracy}
+            if timed_out:
+                break
+
+            value = sign * logs[budget.monitor]
+            if value < best - budget.min_delta:
+                best = value
+                wait = 0
+                if budget.restore_best_weights:
+                    best_weights = [weight.copy() for weight in model.weights]
+            else:
+                wait += 1
+                if wait >= budget.patience:
+                    if best_weights is not None:
+                        model.weights[:] = best_weights
+                    break
+
+    if checkpoint_dir is not None:
+        with timer.phase('save'):
+            save_weights(checkpoint_path(checkpoint_dir, network, dataset, '.npz'), model.weights)
+
+    if weights_dir is not None:
+        with timer.phase('save'):
+            keep_weights(weights_dir, network, dataset, model.weights)
+
+    with timer.phase('evaluate'):
+        loss, accuracy = model.evaluate(x_test, y_test, test_rows, batch_size)
+
+    return {
+        'accuracy': accuracy,
+        'loss': loss,
+        'epochs': initial_epoch + epochs_run,
+        'epochs_run': epochs_run,
+        'seconds': time.time() - start,
+        'timings': timer.timings,
+        'rss_mb': rss_mb(),
+        'peak_rss_mb': peak_rss_mb(),
+        'timed_out': timed_out,
+        'inherited': inherited,
+    }
@@ -7,6 +7,8 @@ Credit:
 """
 from functools import reduce
 from operator import add
+from itertools import accumulate
+import math
 import random
 from network import Network
 from statistics import mean
@@ -14,7 +16,9 @@ from statistics import mean
 class Optimizer():
     """Class that implements genetic algorithm for MLP optimization."""
 
-    def __init__(self, nn_param_choices, retain=0.4, random_select=0.1, mutate_chance=0.2):
+    def __init__(self, nn_param_choices, retain=0.4, random_select=0.1, mutate_chance=0.2,
+                 surrogate=None, oversample=3, selection='tournament', tournament_size=3,
+                 max_attempts=20):
         """Create an optimizer.
 
         Args:
@@ -25,12 +29,31 @@ class Optimizer():
                 remaining in the population
             mutate_chance (float): Probability a network will be
                 randomly mutated
+            surrogate (Surrogate): Model that predicts the accuracy of
+                children, so only the most promising ones are trained
+            oversample (int): Children bred per child kept when a
+                surrogate is used
+            selection (str): How parents are picked from the survivors,
+                'tournament' or 'roulette'
+            tournament_size (int): Survivors competing in each tournament
+            max_attempts (int): Children bred before giving up on finding
+                one that is not already known and trying random networks.
+                Once every network in the search space is known, children
+                are bred without checking.
 
         """
         self.mutate_chance = mutate_chance
         self.random_select = random_select
         self.retain = retain
         self.nn_param_choices = nn_param_choices
+        self.surrogate = surrogate
+        self.oversample = oversample
+        self.selection = selection
+        self.tournament_size = tournament_size
+        self.max_attempts = max_attempts
+        self.history = set()  # (set): keys of every network seen, see remember()
+        self._genome_space = None
+        self._rng = None
 
     def create_population(self, count):
         """Create a population of random networks.
@@ -43,12 +66,86 @@ class Optimizer():
             (list): population of network objects
 
         """
-        population = [Network(self.nn_param_choices) for _ in range(0,count)]
-        for network in population:
+        # Networks are unique until the whole search space is used up.
+        population = []
+        seen = set()
+        while len(population) < count:
+            network = Network(self.nn_param_choices)
             network.create_random()
+            key = self._key(network.network)
+            if key in seen and len(seen) < self.space_size:
+                continue
+            seen.add(key)
+            population.append(network)
 
         return population
 
+    @property
+    def space_size(self):
+        """The number of distinct networks in the search space."""
+        return math.prod(len(choices) for choices in self.nn_param_choices.values())
+
+    @property
+    def genome_space(self):
+        """The GenomeSpace used for array-backed populations."""
+        if self._genome_space is None:
+            # Imported here so the object-based GA does not need NumPy.
+            import numpy as np
+            from genome import GenomeSpace
+
+            self._genome_space = GenomeSpace(self.nn_param_choices)
+            self._rng = np.random.default_rng()
+        return self._genome_space
+
+    def create_population_array(self, count):
+        """Create a population of random genomes as an array.
+
+        Args:
+            count (int): Number of genomes to generate
+
+        Returns:
+            (tuple): Array with one genome per row, and their fitness
+
+        """
+        import numpy as np
+
+        genomes = self.genome_space.random(count, self._rng)
+        return genomes, np.zeros(count)
+
+    def evolve_array(self, genomes, fitness):
+        """Evolve an array-backed population.
+
+        Args:
+            genomes (ndarray): One genome per row
+            fitness (ndarray): Fitness of each genome
+
+        Returns:
+            (tuple): The evolved genomes and their fitness
+
+        """
+        return self.genome_space.evolve(genomes, fitness, self.retain, self.random_select,
+                                        self.mutate_chance, self._rng)
+
+    def to_networks(self, genomes, fitness):
+        """Turn an array-backed population into network objects for training.
+
+        Args:
+            genomes (ndarray): One genome per row
+            fitness (ndarray): Fitness of each genome
+
+        Returns:
+            (list): population of network objects
+
+        """
+        networks = []
+        for genome, accuracy in zip(genomes, fitness.tolist()):
+            network = Network(self.nn_param_choices)
+            network.create_set(self.genome_space.decode(genome))
+            network.accuracy = accuracy
+            networks.append(network)
+
+        return networks
+
     @staticmethod
     def fitness(network):
         """Return the accuracy, which is our fitness function."""
@@ -67,6 +164,128 @@ class Optimizer():
 
         return float(mean(child.accuracy for child in population))
 
+    @staticmethod
+    def closest(child, mother, father):
+        """Return whichever parent shares more parameters with a child.
+
+        A child inherits its trained weights from this parent, since the
+        more alike the two networks are, the better the weights fit.
+        """
+        def shared(parent):
+            return sum(child[key] == parent.get(key) for key in child)
+
+        return father if shared(father) > shared(mother) else mother
+
+    @staticmethod
+    def _key(network):
+        """Return a hashable key for a network's parameters."""
+        return tuple(sorted(network.items()))
+
+    def remember(self, networks):
+        """Add networks to the history, so they are never bred again.
+
+        Args:
+            networks (iterable): Network parameter dicts
+
+        """
+        self.history.update(self._key(network) for network in networks)
+
+    @staticmethod
+    def _cumulative_weights(population):
+        """Return roulette weights for a population, or None if all are zero."""
+        weights = list(accumulate(max(network.accuracy, 0.) for network in population))
+        return weights if weights and weights[-1] > 0 else None
+
+    def _draw(self, population, cum_weights=None, exclude=None):
+        """Return the index of a parent, favouring fitter networks.
+
+        Args:
+            population (list): Scored network objects to pick from
+            cum_weights (list): Roulette weights from _cumulative_weights()
+            exclude (int): Index that must not be drawn, unless it is the
+                only one
+
+        """
+        size = len(population)
+        if exclude is not None and size > 1:
+            size -= 1
+        else:
+            exclude = None
+
+        if self.selection == 'roulette' and cum_weights is not None:
+            for _ in range(self.max_attempts):
+                index = random.choices(range(len(population)), cum_weights=cum_weights)[0]
+                if index != exclude:
+                    return index
+
+        # Draw from the indices without the excluded one, then skip over it.
+        if self.selection == 'roulette':
+            indices = [random.randrange(size)]
+        else:
+            indices = random.sample(range(size), min(self.tournament_size, size))
+        if exclude is not None:
+            indices = [index + (index >= exclude) for index in indices]
+        return max(indices, key=lambda index: population[index].accuracy)
+
+    def select(self, population):
+        """Pick a parent, favouring fitter networks.
+
+        Args:
+            population (list): Scored network objects to pick from
+
+        Returns:
+            (Network): The chosen parent
+
+        """
+        cum_weights = None
+        if self.selection == 'roulette':
+            cum_weights = self._cumulative_weights(population)
+        return population[self._draw(population, cum_weights)]
+
+    def offspring(self, parents, taken, cum_weights=None):
+        """Breed and mutate a child that is not already known.
+
+        Args:
+            parents (list): Scored networks to pick parents from
+            taken (set): Keys of networks that must not be bred again;
+                the child's key is added to it
+            cum_weights (list): Roulette weights of the parents, computed
+                once by the caller when breeding many children
+
+        Returns:
+            (Network): A new, untrained network
+
+        """
+        if self.selection == 'roulette' and cum_weights is None:
+            cum_weights = self._cumulative_weights(parents)
+
+        # Once every network is known, searching for a new one is futile.
+        attempts = self.max_attempts if len(taken) < self.space_size else 1
+        for _ in range(attempts):
+            mother = self._draw(parents, cum_weights)
+            father = self._draw(parents, cum_weights, exclude=mother)
+
+            child = random.choice(self.breed(parents[mother].network, parents[father].network))
+            mutated = self.mutate(child.network)
+            mutated.parent = child.parent
+            if self._key(mutated.network) not in taken:
+                taken.add(self._key(mutated.network))
+                return mutated
+
+        if attempts == 1:
+            return mutated
+
+        # Breeding keeps producing known networks, so try random ones.
+        for _ in range(self.max_attempts):
+            network = Network(self.nn_param_choices)
+            network.create_random()
+            if self._key(network.network) not in taken:
+                taken.add(self._key(network.network))
+                return network
+
+        # Nearly the whole search space has been seen.
+        return mutated
+
     def breed(self, mother, father):
         """Make two children as parts of their parents.
 
@@ -90,6 +309,8 @@ class Optimizer():
         
         childA.create_set(childAParams)
         childB.create_set(childBParams)
+        childA.parent = self.closest(childAParams, mother, father)
+        childB.parent = self.closest(childBParams, mother, father)
 
 
         return [childA, childB]
@@ -98,23 +319,50 @@ class Optimizer():
         """Randomly mutate one part of the network.
 
         Args:
-            network (dict): The network parameters to mutate
+            network (dict): The network parameters to mutate, which are
+                left unchanged
 
         Returns:
             (Network): A randomly mutated network object
 
         """
+        parent = dict(network)
+        network = dict(network)
         mutateChance = random.random()
         hyperparameter_to_mutate = random.choice(list(self.nn_param_choices.keys()))
 
         if mutateChance <= self.mutate_chance:
-            network[hyperparameter_to_mutate] = random.choice(self.nn_param_choices[hyperparameter_to_mutate])
+            # Prefer a value that actually changes the network.
+            choices = self.nn_param_choices[hyperparameter_to_mutate]
+            choices = [value for value in choices
+                       if value != network.get(hyperparameter_to_mutate)] or choices
+            network[hyperparameter_to_mutate] = random.choice(choices)
 
         mutatedNetwork = Network()
         mutatedNetwork.create_set(network)
+        mutatedNetwork.parent = parent
 
         return mutatedNetwork
 
+    def reproduce(self, population):
+        """Breed a single child from the fittest networks of a population.
+
+        Used by steady-state evolution, where a new child is needed each
+        time a network finishes training.
+
+        Args:
+            population (list): A list of scored network objects
+
+        Returns:
+            (Network): A new, untrained network
+
+        """
+        sortedPopulation = sorted(population, key=lambda x: x.accuracy, reverse=True)
+        parents = sortedPopulation[:max(2, int(self.retain * len(population)))]
+
+        self.remember(network.network for network in population)
+        return self.offspring(parents, self.history)
+
     def evolve(self, population):
         """Evolve a population of networks.
 
@@ -127,29 +375,44 @@ class Optimizer():
         """
         originalLength = len(population)
         retainLength = int(self.retain * originalLength)
+        self.remember(network.network for network in population)
 
         sortedPopulation = sorted(population, key=lambda x: x.accuracy, reverse=True)
+
+        # Keep only the best copy of a network that appears more than once.
+        unique = {}
+        for network in sortedPopulation:
+            unique.setdefault(self._key(network.network), network)
+        sortedPopulation = list(unique.values())
         evolvedPopulation = sortedPopulation[:retainLength]
 
         # random select from rejected by chance:
-        for i in range(retainLength, originalLength):
+        for i in range(retainLength, len(sortedPopulation)):
             if random.random() <= self.random_select:
                 evolvedPopulation.append(sortedPopulation[i])
 
         numChildrenNeeded = originalLength - len(evolvedPopulation)
 
-        while numChildrenNeeded > 0:
-            # select two parents:
-            parent1, parent2 = evolvedPopulation[0], evolvedPopulation[1]
-            [child1, child2] = self.breed(parent1.network, parent2.network)
+        # With a surrogate, breed extra children to choose the best from.
+        numCandidates = numChildrenNeeded
+        if self.surrogate is not None:
+            self.surrogate.observe(population)
+            numCandidates *= self.oversample
+
+        # Parents come from every survivor, or the best two if fewer survive.
+        parents = evolvedPopulation if len(evolvedPopulation) >= 2 else sortedPopulation[:2]
+
+        # Every child is new to the population and to the history.
+        taken = set(self.history)
+        cum_weights = None
+        if self.selection == 'roulette':
+            cum_weights = self._cumulative_weights(parents)
+        children = [self.offspring(parents, taken, cum_weights) for _ in range(numCandidates)]
 
-            if numChildrenNeeded == 1:
-                evolvedPopulation.append(child1)
-                numChildrenNeeded -= 1
+        if self.surrogate is not None:
+            children = self.surrogate.rank(children)
 
-            evolvedPopulation.append(child1)
-            evolvedPopulation.append(child2)
-            numChildrenNeeded -= 2
+        evolvedPopulation.extend(children[:numChildrenNeeded])
 
         # Sort the evolved population by fitness
         evolvedPopulation = sorted(evolvedPopulation, key=lambda x: x.accuracy, reverse=True)
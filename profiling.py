@@ -0,0 +1,124 @@
+"""
+Timing and memory instrumentation for the train/evaluate pipeline.
+
+Records are emitted as JSON on the 'metrics' logger, one per trained
+network or generation. setup_logging() in log_config.py writes them to
+their own JSON lines file, so they can be compared across runs.
+profile() runs a block under cProfile and, optionally, tracemalloc.
+"""
+import sys
+import json
+import time
+import logging
+import resource
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import contextmanager
+
+metrics_logger = logging.getLogger('metrics')
+
+class PhaseTimer():
+    """Accumulate wall time spent in the named phases of a task."""
+
+    def __init__(self):
+        self.timings = {}  # (dict): phase name -> seconds
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as part of a phase.
+
+        Args:
+            name (str): Name of the phase
+
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.) + time.perf_counter() - start
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in megabytes.
+
+    This is the peak over the whole life of the process, so in a long-lived
+    process or worker it covers every network trained there before, not
+    just the latest one. rss_mb() gives the current size.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def rss_mb():
+    """Return the current resident set size of this process in megabytes.
+
+    Returns:
+        (float): Resident memory, or None where /proc is unavailable
+
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            pages = int(statm.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+class _JSONRecord():
+    """A record that is only serialized when the log message is formatted."""
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        return json.dumps(self.fields, sort_keys=True, default=str)
+
+def emit(event, **fields):
+    """Log a machine-readable record.
+
+    Args:
+        event (str): Kind of record, e.g. 'network' or 'generation'
+        fields: Values to include in the record
+
+    """
+    if metrics_logger.isEnabledFor(logging.INFO):
+        record = dict(fields, event=event, time=time.time())
+        metrics_logger.info('%s', _JSONRecord(record))
+
+@contextmanager
+def profile(path, trace_memory=False, top=20):
+    """Profile the enclosed block with cProfile and optionally tracemalloc.
+
+    Only code running in this process is profiled; work done in worker
+    processes shows up as time spent waiting on them.
+
+    Args:
+        path (str): File to write the cProfile statistics to
+        trace_memory (bool): Whether to also record where memory is
+            allocated
+        top (int): Number of entries to include in the logged summaries
+
+    """
+    if trace_memory:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+        stats = pstats.Stats(profiler).sort_stats('cumulative')
+        hot_spots = [{'function': pstats.func_std_string(func), 'calls': nc,
+                      'total': tt, 'cumulative': ct}
+                     for func, (cc, nc, tt, ct, callers) in stats.stats.items()]
+        hot_spots.sort(key=lambda entry: entry['cumulative'], reverse=True)
+        emit('profile', path=path, hot_spots=hot_spots[:top])
+
+        if trace_memory:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            allocations = [{'line': str(stat.traceback), 'size': stat.size, 'count': stat.count}
+                           for stat in snapshot.statistics('lineno')[:top]]
+            emit('allocations', path=path, allocations=allocations)
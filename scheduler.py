@@ -0,0 +1,123 @@
+"""
+Successive halving: spend most of the training time on the best networks.
+
+Every network in a generation is trained for a small number of epochs,
+then only the most accurate fraction carries on training for longer,
+resuming from its saved weights rather than starting again. Networks that
+are dropped keep the accuracy they reached, which is enough to rank them
+below the survivors when the population evolves.
+
+A budget's time limit covers all the rounds a network trains in, so a
+survivor only gets the time it has left.
+"""
+import os
+import math
+from concurrent.futures import as_completed
+from evaluator import Evaluator
+from budget import budget_for
+
+class SuccessiveHalving(Evaluator):
+    """Evaluator that trains networks in rounds of increasing epoch budgets."""
+
+    def __init__(self, evaluator, rungs=(3, 10, 100), keep=1 / 3, checkpoint_dir='checkpoints'):
+        """Create a successive halving scheduler.
+
+        Args:
+            evaluator (Evaluator): Evaluator that does the training
+            rungs (tuple): Total epochs trained by the end of each round
+            keep (float): Fraction of networks that go on to the next round
+            checkpoint_dir (str): Directory for the weights of networks
+                between rounds
+
+        """
+        super().__init__(evaluator.cache, budget=evaluator.budget, backend=evaluator.backend)
+        self.store = evaluator.store
+        self.evaluator = evaluator
+        self.rungs = rungs
+        self.keep = keep
+        self.checkpoint_dir = checkpoint_dir
+
+    def _discard(self, key):
+        """Delete the saved weights of a network that is done training."""
+        # Keras saves whole models, the NumPy backend only weights.
+        for extension in ('.keras', '.npz'):
+            checkpoint = os.path.join(self.checkpoint_dir, key + extension)
+            if os.path.exists(checkpoint):
+                os.remove(checkpoint)
+
+    def _run_round(self, genomes, dataset, budgets, **options):
+        """Train networks for one round, each with a budget of its own.
+
+        Networks that share a budget are trained together by the inner
+        evaluator, so it can still fuse or batch them.
+
+        Args:
+            genomes (dict): Network parameters keyed by genome key
+            dataset (str): Dataset to use for training/evaluating
+            budgets (dict): TrainingBudget for each genome key
+            options: Extra arguments for train_and_evaluate
+
+        Yields:
+            (tuple): genome key and the dict returned by train_and_evaluate
+
+        """
+        first = next(iter(budgets.values()), None)
+        if all(budget == first for budget in budgets.values()):
+            yield from self.evaluator.run(genomes, dataset, budget=first, **options)
+            return
+
+        futures = {self.evaluator._submit(network, dataset, budget=budgets[key], **options): key
+                   for key, network in genomes.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    def run(self, genomes, dataset, budget=None, **options):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        if budget is None:
+            budget = budget_for(dataset)
+        remaining = dict(genomes)
+        spent = dict.fromkeys(genomes, 0.)  # (dict): genome key -> seconds trained
+        initial_epoch = 0
+
+        for rung, epochs in enumerate(self.rungs):
+            rung_budget = budget.replace(max_epochs=min(epochs, budget.max_epochs))
+            last_rung = rung == len(self.rungs) - 1 or epochs >= budget.max_epochs
+            budgets = {key: rung_budget for key in remaining}
+            if budget.max_seconds is not None:
+                budgets = {key: rung_budget.replace(max_seconds=budget.max_seconds - spent[key])
+                           for key in remaining}
+            survivors = {}
+
+            for key, result in self._run_round(remaining, dataset, budgets,
+                                               initial_epoch=initial_epoch,
+                                               checkpoint_dir=self.checkpoint_dir,
+                                               **options):
+                # Report the wall time of every round, not just the last.
+                spent[key] += result['seconds']
+                result = dict(result, rung=rung, seconds=spent[key])
+                if budget.max_seconds is not None and spent[key] >= budget.max_seconds:
+                    result['timed_out'] = True
+
+                # A network that stopped early has converged or run out of
+                # time, so it is final.
+                stopped = result['epochs'] < rung_budget.max_epochs or result.get('timed_out')
+                if last_rung or stopped:
+                    self._discard(key)
+                    yield key, result
+                else:
+                    survivors[key] = result
+
+            # Only the best networks go on to the next round.
+            ranked = sorted(survivors, key=lambda key: survivors[key]['accuracy'], reverse=True)
+            keep = math.ceil(len(ranked) * self.keep)
+            for key in ranked[keep:]:
+                self._discard(key)
+                yield key, survivors[key]
+
+            remaining = {key: genomes[key] for key in ranked[:keep]}
+            if not remaining:
+                break
+            initial_epoch = rung_budget.max_epochs
+
+    def close(self):
+        self.evaluator.close()
@@ -0,0 +1,105 @@
+"""
+Surrogate fitness model used to pre-screen offspring before training.
+
+The surrogate predicts a network's accuracy from the accuracies of the
+most similar networks scored so far, which costs microseconds instead of
+the minutes a real training run takes. The Optimizer breeds more children
+than it needs and only keeps the ones the surrogate ranks highest.
+"""
+
+class Surrogate():
+    """k-nearest-neighbour regression over network parameters.
+
+    Parameters whose choices are all numbers are compared by how far
+    apart their values sit in the list of choices; any other parameter
+    counts as a full mismatch when the values differ.
+    """
+
+    def __init__(self, nn_param_choices, k=5):
+        """Create a surrogate with no observations.
+
+        Args:
+            nn_param_choices (dict): Possible network parameters
+            k (int): Number of nearest scored networks to average over
+
+        """
+        self.nn_param_choices = nn_param_choices
+        self.k = k
+        self.observations = {}  # (dict): encoded network -> accuracy
+
+        # Position of each value in its list, scaled to [0, 1] for ordered parameters.
+        self._positions = {}
+        self._ordered = {}
+        for key, choices in nn_param_choices.items():
+            scale = max(len(choices) - 1, 1)
+            self._positions[key] = {value: i / scale for i, value in enumerate(choices)}
+            self._ordered[key] = all(isinstance(value, (int, float)) for value in choices)
+
+    def __len__(self):
+        return len(self.observations)
+
+    def _encode(self, network):
+        """Return a hashable encoding of a network's parameters."""
+        return tuple(self._positions[key][network[key]] for key in self.nn_param_choices)
+
+    def _distance(self, a, b):
+        """Return the distance between two encoded networks."""
+        distance = 0.
+        for ordered, x, y in zip(self._ordered.values(), a, b):
+            if ordered:
+                distance += abs(x - y)
+            elif x != y:
+                distance += 1.
+
+        return distance
+
+    def observe(self, networks):
+        """Add the scores of trained networks to the model.
+
+        Args:
+            networks (list): Networks, untrained ones are ignored
+
+        """
+        for network in networks:
+            if network.accuracy != 0.:
+                self.observations[self._encode(network.network)] = network.accuracy
+
+    def predict(self, network):
+        """Predict the accuracy of a network.
+
+        Args:
+            network (dict): The network parameters
+
+        Returns:
+            (float): Predicted accuracy, or None with no observations
+
+        """
+        if not self.observations:
+            return None
+
+        encoded = self._encode(network)
+        nearest = sorted((self._distance(encoded, other), accuracy)
+                         for other, accuracy in self.observations.items())[:self.k]
+
+        # An exact match is the best prediction there is.
+        if nearest[0][0] == 0.:
+            return nearest[0][1]
+
+        weights = [1. / distance for distance, accuracy in nearest]
+        return sum(weight * accuracy for weight, (distance, accuracy)
+                   in zip(weights, nearest)) / sum(weights)
+
+    def rank(self, networks):
+        """Sort networks by predicted accuracy, most promising first.
+
+        Args:
+            networks (list): Network objects
+
+        Returns:
+            (list): The same networks, best predicted first
+
+        """
+        if not self.observations:
+            return list(networks)
+
+        return sorted(networks, key=lambda network: self.predict(network.network), reverse=True)
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+from broker import SQLiteBroker
+
+class TestSQLiteBroker(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.broker = SQLiteBroker(os.path.join(self.directory.name, 'queue.db'))
+        self.network1 = {'nb_neurons': 1024, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def test_claim_and_complete(self):
+        task_id = self.broker.put(self.network1, 'mnist', {'initial_epoch': 0})
+
+        self.assertEqual(self.broker.claim('a'), (task_id, self.network1, 'mnist', {'initial_epoch': 0}))
+        self.assertIsNone(self.broker.claim('b'), "Task claimed twice.")
+        self.assertEqual(self.broker.finished([task_id]), {})
+
+        self.broker.complete(task_id, 'a', {'accuracy': 0.5})
+        self.assertEqual(self.broker.finished([task_id]), {task_id: ('done', {'accuracy': 0.5})})
+
+
+    def test_fail(self):
+        task_id = self.broker.put(self.network1, 'mnist', {})
+        self.broker.claim('a')
+        self.broker.fail(task_id, 'a', 'boom')
+
+        self.assertEqual(self.broker.finished([task_id]), {task_id: ('failed', 'boom')})
+
+
+    def test_requeue_stale(self):
+        self.broker.heartbeat_timeout = -1.
+        task_id = self.broker.put(self.network1, 'mnist', {})
+        self.broker.claim('a')
+
+        self.assertEqual(self.broker.requeue_stale(), 1)
+        self.assertFalse(self.broker.heartbeat(task_id, 'a'), "Lost worker still owns the task.")
+        self.assertEqual(self.broker.claim('b')[0], task_id)
+
+        # A result from the lost worker is ignored.
+        self.broker.complete(task_id, 'a', {'accuracy': 0.1})
+        self.assertEqual(self.broker.finished([task_id]), {})
+
+
+    def test_gives_up_after_max_attempts(self):
+        self.broker.heartbeat_timeout = -1.
+        task_id = self.broker.put(self.network1, 'mnist', {})
+        for worker in 'abc':
+            self.broker.claim(worker)
+            self.broker.requeue_stale()
+
+        self.assertEqual(self.broker.finished([task_id])[task_id][0], 'failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
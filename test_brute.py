@@ -0,0 +1,68 @@
+import os
+import tempfile
+import unittest
+from itertools import islice
+from brute import iter_networks, generate_network_list, stored_networks, train_networks
+from fitness_store import FitnessStore
+
+class TestBrute(unittest.TestCase):
+    def setUp(self):
+        self.nn_param_choices = {
+        'nb_neurons': [64, 128, 256],
+        'nb_layers': [1, 2, 3, 4],
+        'activation': ['relu', 'elu'],
+        'optimizer': ['rmsprop', 'adam', 'sgd', 'adagrad','adadelta'],
+        }
+
+    def genomes(self, networks):
+        return [tuple(network.network.items()) for network in networks]
+
+
+    def test_generate_network_list(self):
+        networks = generate_network_list(self.nn_param_choices)
+
+        self.assertEqual(len(networks), 120)
+        self.assertEqual(len(set(self.genomes(networks))), 120, "Duplicate networks.")
+        self.assertEqual(networks[0].network, {'nb_neurons': 64, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'rmsprop'})
+        self.assertEqual(list(networks[0].network), list(self.nn_param_choices), "Keys out of order.")
+
+
+    def test_shuffle(self):
+        ordered = self.genomes(iter_networks(self.nn_param_choices))
+        shuffled = self.genomes(iter_networks(self.nn_param_choices, shuffle=True, seed=1))
+
+        self.assertNotEqual(ordered, shuffled, "Order not shuffled.")
+        self.assertEqual(sorted(ordered), sorted(shuffled), "Shuffle repeated or dropped networks.")
+
+
+    def test_shards(self):
+        shards = [self.genomes(iter_networks(self.nn_param_choices, shard, 3, shuffle=True, seed=2))
+                  for shard in range(3)]
+
+        self.assertEqual(sum(len(shard) for shard in shards), 120)
+        self.assertEqual(len(set().union(*shards)), 120, "Shards overlap.")
+
+
+    def test_skip(self):
+        networks = list(iter_networks(self.nn_param_choices,
+                                      skip=lambda network: network['activation'] == 'relu'))
+
+        self.assertEqual(len(networks), 60)
+        self.assertTrue(all(network.network['activation'] == 'elu' for network in networks))
+
+
+    def test_resumed_best(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = FitnessStore(os.path.join(directory, 'fitness.jsonl'))
+            for i, network in enumerate(islice(iter_networks(self.nn_param_choices), 8)):
+                store.record(network.network, 'mnist', {'accuracy': i / 10})
+            store.record({'nb_neurons': 64}, 'cifar10', {'accuracy': 1.})
+
+            best = train_networks([], 'mnist', top=3, scored=stored_networks(store, 'mnist'))
+
+        self.assertEqual([network.accuracy for network in best], [0.7, 0.6, 0.5],
+                         "Earlier scores ignored.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from budget import TrainingBudget, budget_for
+
+class TestTrainingBudget(unittest.TestCase):
+    def test_replace(self):
+        budget = TrainingBudget(patience=5)
+        shorter = budget.replace(max_epochs=3)
+
+        self.assertEqual(shorter.max_epochs, 3)
+        self.assertEqual(shorter.patience, 5)
+        self.assertEqual(budget.max_epochs, 100, "Original budget changed.")
+
+
+    def test_equality(self):
+        self.assertEqual(TrainingBudget(max_seconds=60), TrainingBudget(max_seconds=60))
+        self.assertNotEqual(TrainingBudget(max_seconds=60), TrainingBudget())
+
+
+    def test_budget_for(self):
+        self.assertEqual(budget_for('cifar10').patience, 2)
+        self.assertEqual(budget_for('unknown'), TrainingBudget())
+        self.assertEqual(budget_for('mnist@0.1'), budget_for('mnist'))
+
+
+if __name__ == '__main__':
+    unittest.main()
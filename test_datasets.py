@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from datasets import (with_fidelity, split_fidelity, stratified_subset, materialize_dataset,
+                      load_dataset, evict_dataset, cached_datasets, set_data_dir)
+
+class TestFidelity(unittest.TestCase):
+    def test_round_trip(self):
+        self.assertEqual(with_fidelity('cifar10', 1.), 'cifar10')
+        self.assertEqual(split_fidelity(with_fidelity('cifar10', 0.25)), ('cifar10', 0.25))
+        self.assertEqual(split_fidelity('mnist'), ('mnist', 1.))
+
+
+    def test_stratified_subset(self):
+        labels = np.repeat([0, 1, 2], [100, 50, 10])
+        y = np.eye(3)[labels]
+        rows = stratified_subset(y, 0.2)
+
+        self.assertEqual(np.bincount(labels[rows]).tolist(), [20, 10, 2])
+        self.assertEqual(rows.tolist(), sorted(set(rows.tolist())), "Rows not sorted and unique.")
+        self.assertEqual(rows.tolist(), stratified_subset(y, 0.2).tolist(), "Subset not repeatable.")
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        evict_dataset()
+
+    def tearDown(self):
+        evict_dataset()
+
+
+    def test_loaded_once(self):
+        first = load_dataset('synthetic')
+        second = load_dataset('synthetic')
+
+        self.assertEqual(cached_datasets(), ['synthetic'])
+        for array, again in zip(first[3:], second[3:]):
+            self.assertTrue(np.shares_memory(array, again), "Dataset loaded twice.")
+
+
+    def test_read_only(self):
+        x_train = load_dataset('synthetic')[3]
+
+        with self.assertRaises(ValueError):
+            x_train[0, 0] = 1.
+
+
+    def test_evict(self):
+        load_dataset('synthetic')
+        evict_dataset('mnist')
+        self.assertEqual(cached_datasets(), ['synthetic'], "Evicted the wrong dataset.")
+
+        evict_dataset('synthetic')
+        self.assertEqual(cached_datasets(), [])
+
+        load_dataset('synthetic')
+        evict_dataset()
+        self.assertEqual(cached_datasets(), [])
+
+
+class TestMaterialize(unittest.TestCase):
+    def test_concurrent_materialize(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                targets = list(executor.map(lambda _: materialize_dataset('synthetic', directory),
+                                            range(4)))
+
+            self.assertEqual(len(set(targets)), 1)
+            self.assertEqual(sorted(os.listdir(targets[0])),
+                             ['meta.json', 'x_test.npy', 'x_train.npy', 'y_test.npy', 'y_train.npy'])
+
+
+    def test_memory_mapped_load(self):
+        calls = []
+
+        def load_stub():
+            calls.append(1)
+            x = np.arange(12, dtype='float32').reshape(6, 2)
+            y = np.eye(3, dtype='float32')[[0, 1, 2, 0, 1, 2]]
+            return 3, 2, (2,), x[:4], x[4:], y[:4], y[4:]
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch.dict('datasets.LOADERS', stub=load_stub):
+            set_data_dir(directory)
+            try:
+                nb_classes, batch_size, input_shape, *arrays = load_dataset('stub')
+                self.assertEqual((nb_classes, batch_size, input_shape), (3, 2, (2,)))
+                for array in arrays:
+                    self.assertIsInstance(array, np.memmap)
+                    self.assertFalse(array.flags.writeable)
+                self.assertEqual(arrays[0].tolist(), [[0., 1.], [2., 3.], [4., 5.], [6., 7.]])
+
+                evict_dataset('stub')
+                load_dataset('stub')
+                self.assertEqual(len(calls), 1, "Dataset loaded again instead of mapped.")
+            finally:
+                set_data_dir(None)
+                evict_dataset('stub')
+
+
+if __name__ == '__main__':
+    unittest.main()
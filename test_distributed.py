@@ -0,0 +1,47 @@
+import sqlite3
+import unittest
+from distributed import DistributedEvaluator
+
+class FlakyBroker():
+    """Broker that fails a number of polls before finishing every task."""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.tasks = []
+
+    def put(self, network, dataset, options):
+        self.tasks.append(network)
+        return len(self.tasks)
+
+    def requeue_stale(self):
+        if self.failures:
+            self.failures -= 1
+            raise sqlite3.OperationalError('database is locked')
+        return 0
+
+    def finished(self, task_ids):
+        return {task_id: ('done', {'accuracy': 0.5}) for task_id in task_ids}
+
+
+class TestDistributedEvaluator(unittest.TestCase):
+    def setUp(self):
+        self.network = {'nb_neurons': 64, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
+
+
+    def test_retries_broker_errors(self):
+        evaluator = DistributedEvaluator(FlakyBroker(failures=3), poll_interval=0.01)
+        future = evaluator._submit(self.network, 'mnist')
+        self.assertEqual(future.result(timeout=5), {'accuracy': 0.5})
+
+
+    def test_fails_pending_tasks_when_broker_is_gone(self):
+        evaluator = DistributedEvaluator(FlakyBroker(failures=100), poll_interval=0.01)
+        evaluator.max_poll_errors = 3
+        future = evaluator._submit(self.network, 'mnist')
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=5)
+        self.assertIsNone(evaluator._poller)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from budget import TrainingBudget
+from evaluator import Evaluator, FusedEvaluator, ProcessPoolEvaluator
+from fitness_cache import genome_key
+from fitness_store import FitnessStore
+from network import Network
+from numpy_mlp import train_and_evaluate
+
+class FakeEvaluator(Evaluator):
+    """Scores each network by its width; networks wider than 64 time out."""
+
+    def run(self, genomes, dataset, **options):
+        for key, network in genomes.items():
+            yield key, {'accuracy': network['nb_neurons'] / 100, 'seconds': 1.,
+                        'timed_out': network['nb_neurons'] > 64}
+
+
+class TestEvaluator(unittest.TestCase):
+    def test_timeout_penalty(self):
+        networks = []
+        for nb_neurons in (32, 80):
+            network = Network()
+            network.create_set({'nb_neurons': nb_neurons})
+            networks.append(network)
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = FitnessStore(os.path.join(directory, 'fitness.jsonl'))
+            evaluator = FakeEvaluator(store=store)
+            evaluator.evaluate(networks, 'mnist')
+
+        self.assertAlmostEqual(networks[0].accuracy, 0.32)
+        self.assertAlmostEqual(networks[1].accuracy, 0.8 * (1 - evaluator.timeout_penalty))
+        record = store.get({'nb_neurons': 80}, 'mnist')
+        self.assertAlmostEqual(record['raw_accuracy'], 0.8, msg="Raw accuracy not kept.")
+        self.assertAlmostEqual(record['accuracy'], networks[1].accuracy)
+        self.assertNotIn('raw_accuracy', store.get({'nb_neurons': 32}, 'mnist'))
+
+
+class TestFusedEvaluator(unittest.TestCase):
+    def test_groups(self):
+        evaluator = FusedEvaluator(group_size=2, max_neurons=256)
+        genomes = {
+            'a': {'nb_neurons': 64, 'nb_layers': 1},
+            'b': {'nb_neurons': 128, 'nb_layers': 2},
+            'c': {'nb_neurons': 64, 'nb_layers': 3},
+            'd': {'nb_neurons': 1024, 'nb_layers': 1},
+            'e': {'nb_neurons': 64, 'nb_layers': 1, 'batch_size': 32},
+        }
+
+        groups = evaluator.groups(genomes)
+        self.assertEqual(sorted(key for group in groups for key in group), sorted(genomes))
+        self.assertIn(['d'], groups, "Wide network not trained alone.")
+        self.assertIn(['e'], groups, "Batch sizes mixed in a group.")
+        self.assertTrue(all(len(group) <= 2 for group in groups), "Group too large.")
+
+
+    def test_keras_only(self):
+        with self.assertRaises(ValueError):
+            FusedEvaluator(backend='numpy')
+
+
+class TestProcessPoolEvaluator(unittest.TestCase):
+    def test_results_map_back_to_networks(self):
+        dataset = 'synthetic@0.2'
+        budget = TrainingBudget(max_epochs=1)
+        parent = {'nb_neurons': 16, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'adam'}
+        genomes = {genome_key(network, dataset): network for network in (
+            dict(parent, nb_neurons=32),
+            dict(parent, nb_layers=2),
+            dict(parent, activation='tanh'),
+            dict(parent, optimizer='sgd'),
+        )}
+        # Only the first network has a parent, so only its result inherits.
+        child = next(iter(genomes))
+
+        with tempfile.TemporaryDirectory() as weights_dir:
+            train_and_evaluate(parent, dataset, budget, weights_dir=weights_dir)
+            with ProcessPoolEvaluator(workers=2, backend='numpy') as evaluator:
+                results = dict(evaluator.run(genomes, dataset, budget=budget,
+                                             weights_dir=weights_dir, parents={child: parent}))
+
+        self.assertEqual(sorted(results), sorted(genomes), "Not every network scored.")
+        for key, result in results.items():
+            self.assertEqual(result['inherited'], key == child, "Result given to the wrong network.")
+
+
+    def test_workers_materialize_datasets(self):
+        network = {'nb_neurons': 16, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'adam'}
+        genomes = {genome_key(network, 'synthetic'): network}
+
+        def load_in_coordinator():
+            raise AssertionError("Dataset loaded in the coordinator.")
+
+        with tempfile.TemporaryDirectory() as data_dir, \
+                mock.patch.dict('datasets.LOADERS', synthetic=load_in_coordinator):
+            with ProcessPoolEvaluator(workers=1, data_dir=data_dir, backend='numpy') as evaluator:
+                results = dict(evaluator.run(genomes, 'synthetic',
+                                             budget=TrainingBudget(max_epochs=1)))
+
+            self.assertIn('meta.json', os.listdir(os.path.join(data_dir, 'synthetic')))
+        self.assertGreater(results[genome_key(network, 'synthetic')]['accuracy'], 0.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+from fitness_cache import FitnessCache, genome_key
+
+class TestFitnessCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = FitnessCache()
+        self.network1 = {'nb_neurons': 1024, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
+        self.network2 = {'nb_neurons': 64, 'nb_layers': 3, 'activation': 'tanh', 'optimizer': 'adagrad'}
+
+
+    def test_genome_key_ignores_order(self):
+        reordered = {'optimizer': 'sgd', 'activation': 'relu', 'nb_layers': 1, 'nb_neurons': 1024}
+        self.assertEqual(genome_key(self.network1, 'mnist'), genome_key(reordered, 'mnist'))
+
+
+    def test_genome_key_depends_on_dataset(self):
+        self.assertNotEqual(genome_key(self.network1, 'mnist'), genome_key(self.network1, 'cifar10'))
+
+
+    def test_lookup_counts(self):
+        self.cache.record(self.network1, 'mnist', 0.9)
+
+        self.assertEqual(self.cache.lookup(dict(self.network1), 'mnist'), 0.9)
+        self.assertIsNone(self.cache.lookup(self.network2, 'mnist'))
+        self.assertIsNone(self.cache.lookup(self.network1, 'cifar10'))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+
+        self.cache.reset_counts()
+        self.assertEqual((self.cache.hits, self.cache.misses), (0, 0))
+        self.assertEqual(len(self.cache), 1)
+
+
+    def test_shared_scores(self):
+        other = FitnessCache(self.cache.scores)
+        other.record(self.network1, 'mnist', 0.9)
+
+        self.assertEqual(self.cache.lookup(self.network1, 'mnist'), 0.9)
+        self.assertEqual((other.hits, self.cache.hits), (0, 1), "Counts shared between caches.")
+
+
+if __name__ == '__main__':
+    unittest.main()
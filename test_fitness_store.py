@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from fitness_store import FitnessStore
+
+class TestFitnessStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'fitness.jsonl')
+        self.network1 = {'nb_neurons': 1024, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
+        self.result = {'accuracy': 0.5, 'loss': 1.2, 'epochs': 4, 'seconds': 10.0}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def test_record_survives_reopen(self):
+        FitnessStore(self.path).record(self.network1, 'mnist', self.result)
+
+        store = FitnessStore(self.path)
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.get(self.network1, 'mnist')['epochs'], 4)
+        self.assertIsNone(store.get(self.network1, 'cifar10'))
+
+
+    def test_skips_truncated_line(self):
+        FitnessStore(self.path).record(self.network1, 'mnist', self.result)
+        with open(self.path, 'a') as f:
+            f.write('{"type": "netw')
+
+        self.assertEqual(len(FitnessStore(self.path)), 1)
+
+
+    def test_last_generation(self):
+        store = FitnessStore(self.path)
+        population = [SimpleNamespace(network=self.network1, accuracy=0.5)]
+        store.record_generation(0, population, 'mnist')
+        store.record_generation(1, population, 'mnist')
+
+        checkpoint = FitnessStore(self.path).last_generation('mnist')
+        self.assertEqual(checkpoint['generation'], 1)
+        self.assertEqual(checkpoint['population'][0]['network'], self.network1)
+        self.assertIsNone(store.last_generation('cifar10'))
+
+
+if __name__ == '__main__':
+    unittest.main()
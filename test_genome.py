@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+from genome import GenomeSpace
+
+class TestGenomeSpace(unittest.TestCase):
+    def setUp(self):
+        self.nn_param_choices = {
+        'nb_neurons': [64, 128, 256, 512, 768, 1024],
+        'nb_layers': [1, 2, 3, 4],
+        'activation': ['relu', 'elu', 'tanh', 'sigmoid'],
+        'optimizer': ['rmsprop', 'adam', 'sgd', 'adagrad','adadelta', 'adamax', 'nadam'],
+        }
+
+        self.space = GenomeSpace(self.nn_param_choices)
+        self.rng = np.random.default_rng(0)
+        self.network1 = {'nb_neurons': 1024, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
+
+
+    def test_round_trip(self):
+        genome = self.space.encode(self.network1)
+        self.assertEqual(genome.tolist(), [5, 0, 0, 2])
+        self.assertEqual(self.space.decode(genome), self.network1)
+
+
+    def test_random_in_range(self):
+        genomes = self.space.random(1000, self.rng)
+        self.assertEqual(genomes.shape, (1000, 4))
+        self.assertTrue((genomes < self.space.sizes).all(), "Gene out of range.")
+
+
+    def test_crossover(self):
+        mothers = np.zeros((100, 4), dtype=self.space.dtype)
+        fathers = np.ones((100, 4), dtype=self.space.dtype)
+        children_a, children_b = self.space.crossover(mothers, fathers, self.rng)
+
+        # Every child starts with its first parent's genes and ends with the other's.
+        self.assertTrue((children_a[:, 0] == 0).all())
+        self.assertTrue((children_a[:, -1] == 1).all())
+        self.assertTrue((children_a + children_b == 1).all())
+
+
+    def test_mutate(self):
+        genomes = self.space.random(1000, self.rng)
+        mutated = self.space.mutate(genomes, 1.0, self.rng)
+
+        self.assertTrue(((genomes != mutated).sum(axis=1) <= 1).all(), "More than one gene mutated.")
+        self.assertTrue((mutated < self.space.sizes).all(), "Gene out of range.")
+
+
+    def test_evolve(self):
+        genomes = self.space.random(100, self.rng)
+        fitness = self.rng.random(100)
+        evolved, evolved_fitness = self.space.evolve(genomes, fitness, 0.4, 0.1, 0.2, self.rng)
+
+        self.assertEqual(evolved.shape, genomes.shape)
+        self.assertEqual(len(evolved_fitness), 100)
+        self.assertEqual(evolved_fitness.max(), fitness.max(), "Fittest genome lost.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+from islands import IslandModel, ring, complete
+from network import Network
+
+class TestIslandModel(unittest.TestCase):
+    def setUp(self):
+        self.nn_param_choices = {
+        'nb_neurons': [64, 128, 256, 512, 768, 1024],
+        'nb_layers': [1, 2, 3, 4],
+        }
+
+    def population(self, accuracies, nb_layers):
+        networks = []
+        for i, accuracy in enumerate(accuracies):
+            network = Network(self.nn_param_choices)
+            network.create_set({'nb_neurons': self.nn_param_choices['nb_neurons'][i],
+                                'nb_layers': nb_layers})
+            network.accuracy = accuracy
+            networks.append(network)
+        return networks
+
+
+    def test_topologies(self):
+        self.assertEqual(ring(3, 4, None), [0])
+        self.assertEqual(complete(1, 3, None), [0, 2])
+
+
+    def test_migrate(self):
+        model = IslandModel([None, None], migration_interval=2, migrants=1)
+        strong = self.population([0.9, 0.8, 0.7], nb_layers=1)
+        weak = self.population([0.3, 0.2, 0.1], nb_layers=2)
+
+        self.assertIs(model.migrate(0, 0, strong), strong, "Migrated between intervals.")
+
+        model.migrate(0, 1, strong)
+        weak = model.migrate(1, 1, weak)
+        self.assertEqual(len(weak), 3)
+        self.assertEqual(weak[-1].accuracy, 0.9, "Best migrant did not replace the weakest.")
+        self.assertEqual(weak[-1].network, strong[0].network)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import json
+import logging
+import tempfile
+import unittest
+from log_config import setup_logging
+from profiling import emit
+
+class TestLogConfig(unittest.TestCase):
+    def setUp(self):
+        self.root = logging.getLogger()
+        self.handlers = list(self.root.handlers)
+        self.level = self.root.level
+        self.directory = tempfile.TemporaryDirectory()
+
+
+    def tearDown(self):
+        self.root.handlers = self.handlers
+        self.root.setLevel(self.level)
+        self.directory.cleanup()
+
+
+    def test_metrics_go_to_their_own_file(self):
+        log_file = os.path.join(self.directory.name, 'log.txt')
+        metrics_file = os.path.join(self.directory.name, 'metrics.jsonl')
+        listener = setup_logging(log_file, metrics_file)
+        logging.info("Trained %d networks", 3)
+        emit('network', accuracy=0.5)
+        listener.stop()
+
+        with open(log_file) as f:
+            log = f.read()
+        with open(metrics_file) as f:
+            records = [json.loads(line) for line in f]
+        self.assertIn('Trained 3 networks', log)
+        self.assertNotIn('accuracy', log)
+        self.assertEqual([record['event'] for record in records], ['network'])
+        self.assertEqual(records[0]['accuracy'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from budget import TrainingBudget
+from evaluator import Evaluator, SerialEvaluator
+from fitness_store import FitnessStore
+from main import generate, generate_steady_state
+
+class RecordingEvaluator(SerialEvaluator):
+    """Remember the accuracy of every network that finishes training."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.finished = []
+
+    def finish(self, network, dataset, result):
+        super().finish(network, dataset, result)
+        self.finished.append(network.accuracy)
+
+
+class FakeEvaluator(Evaluator):
+    """Scores each network by its width, counting the generations trained."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.generations = 0
+
+    def run(self, genomes, dataset, **options):
+        self.generations += 1
+        for key, network in genomes.items():
+            yield key, {'accuracy': network['nb_neurons'] / 100, 'seconds': 1.}
+
+
+class TestGenerate(unittest.TestCase):
+    def test_stops_at_the_time_budget(self):
+        nn_param_choices = {'nb_neurons': [8, 16, 32, 64], 'nb_layers': [1, 2]}
+        with tempfile.TemporaryDirectory() as directory:
+            store = FitnessStore(os.path.join(directory, 'fitness.jsonl'))
+            evaluator = FakeEvaluator(store=store)
+            networks = generate(3, 4, nn_param_choices, 'mnist', evaluator, time_budget=0)
+
+            self.assertEqual(evaluator.generations, 1, "Trained past the time budget.")
+            self.assertEqual(len(networks), 4)
+            self.assertEqual(store.last_generation('mnist')['generation'], 0,
+                             "Last generation not recorded.")
+            self.assertEqual(FitnessStore(store.path).last_generation('mnist')['generation'], 0)
+
+
+class TestSteadyState(unittest.TestCase):
+    def setUp(self):
+        self.nn_param_choices = {
+        'nb_neurons': [8, 16, 32],
+        'nb_layers': [1, 2],
+        'activation': ['relu', 'tanh'],
+        'optimizer': ['adam', 'sgd'],
+        }
+
+
+    def test_weakest_networks_are_replaced(self):
+        evaluator = RecordingEvaluator(budget=TrainingBudget(max_epochs=1), backend='numpy')
+        networks = generate_steady_state(8, 3, self.nn_param_choices, 'synthetic@0.2',
+                                         evaluator=evaluator)
+
+        self.assertEqual(len(evaluator.finished), 8, "Wrong number of networks trained.")
+        self.assertEqual([network.accuracy for network in networks],
+                         sorted(evaluator.finished, reverse=True)[:3],
+                         "Population is not the best networks trained.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import numpy as np
+from morphism import widen, deepen, morph
+
+def forward(weights, x):
+    """Run a relu MLP with softmax-free output on a batch."""
+    for i in range(0, len(weights) - 2, 2):
+        x = np.maximum(x @ weights[i] + weights[i + 1], 0.)
+    return x @ weights[-2] + weights[-1]
+
+def random_weights(rng, nb_inputs, nb_neurons, nb_layers, nb_classes):
+    sizes = [nb_inputs] + [nb_neurons] * nb_layers + [nb_classes]
+    weights = []
+    for a, b in zip(sizes, sizes[1:]):
+        weights.extend([rng.normal(size=(a, b)), rng.normal(size=b)])
+    return weights
+
+class TestMorphism(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        self.parent = random_weights(self.rng, 8, 4, 2, 3)
+        self.x = self.rng.normal(size=(16, 8))
+
+
+    def test_widen_preserves_function(self):
+        child = widen(self.parent, 10, self.rng)
+        self.assertEqual(child[0].shape, (8, 10))
+        self.assertEqual(child[2].shape, (10, 10))
+        self.assertEqual(child[4].shape, (10, 3))
+        np.testing.assert_allclose(forward(child, self.x), forward(self.parent, self.x))
+
+
+    def test_deepen_preserves_function(self):
+        child = deepen(self.parent, 4)
+        self.assertEqual(len(child), 10)
+        np.testing.assert_allclose(forward(child, self.x), forward(self.parent, self.x))
+
+
+    def test_shrink(self):
+        child = morph(self.parent, {'nb_neurons': 2, 'nb_layers': 1}, self.rng)
+        self.assertEqual([w.shape for w in child], [(8, 2), (2,), (2, 3), (3,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
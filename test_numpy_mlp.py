@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from budget import TrainingBudget
+from evaluator import SerialEvaluator
+from fitness_cache import genome_key
+from network import Network
+from numpy_mlp import ACTIVATIONS, MLP, OPTIMIZERS, init_weights, train_and_evaluate
+
+class TestNumpyMLP(unittest.TestCase):
+    def setUp(self):
+        self.network = {'nb_neurons': 32, 'nb_layers': 2, 'activation': 'relu', 'optimizer': 'adam'}
+        self.budget = TrainingBudget(max_epochs=2)
+        self.rng = np.random.default_rng(0)
+
+
+    def test_gradients_match_finite_differences(self):
+        x = self.rng.normal(size=(8, 5)).astype('float64')
+        y = np.eye(3)[self.rng.integers(0, 3, 8)]
+        for activation in ACTIVATIONS:
+            network = dict(self.network, nb_neurons=4, activation=activation)
+            weights = [w.astype('float64') for w in init_weights(network, 5, 3, self.rng)]
+            model = MLP(weights, activation, 'sgd', dropout=0.)
+            loss, correct, gradients = model.gradients(x, y)
+
+            weights[2][1, 2] += 1e-6
+            shifted = model.gradients(x, y)[0]
+            self.assertAlmostEqual((shifted - loss) / 1e-6 / len(x), gradients[2][1, 2],
+                                   places=4, msg=activation)
+
+
+    def test_every_optimizer_learns(self):
+        for optimizer in OPTIMIZERS:
+            network = dict(self.network, optimizer=optimizer)
+            result = train_and_evaluate(network, 'synthetic', self.budget)
+            self.assertEqual(result['epochs'], 2)
+            self.assertTrue(np.isfinite(result['loss']), optimizer)
+            self.assertGreater(result['accuracy'], 0.05, optimizer)
+            if optimizer == 'adam':
+                self.assertGreater(result['accuracy'], 0.9)
+
+
+    def test_children_inherit_weights(self):
+        with tempfile.TemporaryDirectory() as weights_dir:
+            result = train_and_evaluate(self.network, 'synthetic@0.2', self.budget,
+                                        weights_dir=weights_dir)
+            self.assertFalse(result['inherited'])
+
+            child = dict(self.network, nb_neurons=64, nb_layers=3)
+            parents = {genome_key(child, 'synthetic@0.2'): self.network}
+            result = train_and_evaluate(child, 'synthetic@0.2', self.budget,
+                                        weights_dir=weights_dir, parents=parents)
+            self.assertTrue(result['inherited'])
+            self.assertTrue(os.path.exists(
+                os.path.join(weights_dir, genome_key(child, 'synthetic') + '.npz')))
+
+
+    def test_selected_through_evaluator(self):
+        networks = []
+        for nb_neurons in (16, 32):
+            network = Network()
+            network.create_set(dict(self.network, nb_neurons=nb_neurons))
+            networks.append(network)
+
+        SerialEvaluator(budget=self.budget, backend='numpy').evaluate(networks, 'synthetic@0.2')
+        for network in networks:
+            self.assertGreater(network.accuracy, 0.)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,6 @@
+import sys
 import unittest
+import subprocess
 from optimizer import Optimizer
 from network import Network
 import random
@@ -51,12 +53,69 @@ class TestOptimiser(unittest.TestCase):
         self.assertNotEqual(offspring[0], self.network1, "Offspring still the same as parent.")
         
 
+    def test_breed_records_closest_parent(self):
+        for child in self.optimizer.breed(self.network1, self.network2):
+            matches = [sum(child.network[key] == parent[key] for key in parent)
+                       for parent in (self.network1, self.network2)]
+            self.assertIn(child.parent, (self.network1, self.network2))
+            self.assertEqual(sum(child.network[key] == child.parent[key] for key in child.network),
+                             max(matches), "Child does not inherit from its closest parent.")
+
+
     def test_mutate(self):
         self.optimizer.mutate_chance = 1.0
         network1original = {'nb_neurons': 1024, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
         mutatedNetwork = self.optimizer.mutate(self.network1)
         self.assertNotEqual(mutatedNetwork.network.items(), network1original.items(), "Failed to mutate")
 
+    def test_mutate_leaves_parent_unchanged(self):
+        self.optimizer.mutate_chance = 1.0
+        original = dict(self.network1)
+        for _ in range(20):
+            mutatedNetwork = self.optimizer.mutate(self.network1)
+            self.assertEqual(self.network1, original, "Parent modified in place.")
+            self.assertNotEqual(mutatedNetwork.network, original, "Mutation kept the same value.")
+
+
+    def test_evolve_children_are_new(self):
+        count = 10
+        population = self.optimizer.create_population(count)
+        for network in population:
+            network.accuracy = random.uniform(0, 1)
+
+        evolved_population = self.optimizer.evolve(population)
+        keys = [tuple(sorted(network.network.items())) for network in evolved_population]
+        self.assertEqual(len(keys), len(set(keys)), "Duplicate networks in population.")
+
+        parents = set(tuple(sorted(network.network.items())) for network in population)
+        for network in evolved_population:
+            if network.accuracy == 0.:
+                self.assertNotIn(tuple(sorted(network.network.items())), parents,
+                                 "Child repeats a scored network.")
+
+
+    def test_create_population_unique(self):
+        population = self.optimizer.create_population(50)
+        keys = set(tuple(sorted(network.network.items())) for network in population)
+        self.assertEqual(len(keys), 50)
+
+
+    def test_evolve_exhausted_space(self):
+        optimizer = Optimizer({'nb_neurons': [64, 128], 'nb_layers': [1, 2]})
+        population = optimizer.create_population(20)
+        for network in population:
+            network.accuracy = random.uniform(0, 1)
+        self.assertEqual(len(optimizer.evolve(population)), 20)
+
+
+    def test_select_prefers_fitter(self):
+        population = self.optimizer.create_population(10)
+        for i, network in enumerate(population):
+            network.accuracy = i / 10
+        self.optimizer.tournament_size = len(population)
+        self.assertIs(self.optimizer.select(population), population[-1])
+
+
     def test_evolve(self):
         count = 10
         population = self.optimizer.create_population(count)
@@ -74,5 +133,15 @@ class TestOptimiser(unittest.TestCase):
         self.assertGreater(sumEvolvePopulation, sumPopulation, "population didn't evolve")
 
 
+    def test_import_does_not_load_tensorflow(self):
+        # Coordinators import these; only training should pay for TensorFlow.
+        code = ("import sys, optimizer, brute, main, islands, worker; "
+                "print(' '.join(m for m in ('tensorflow', 'keras') if m in sys.modules))")
+        loaded = subprocess.run([sys.executable, '-c', code], check=True,
+                                capture_output=True, text=True).stdout.strip()
+        self.assertEqual(loaded, '', "Importing the GA loaded %s" % loaded)
+
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+import os
+import json
+import logging
+import tempfile
+import unittest
+from profiling import PhaseTimer, emit, metrics_logger, profile
+
+class ListHandler(logging.Handler):
+    """Keep every record logged."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.handler = ListHandler()
+        self.level = metrics_logger.level
+        metrics_logger.addHandler(self.handler)
+        metrics_logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        metrics_logger.removeHandler(self.handler)
+        metrics_logger.setLevel(self.level)
+
+    def events(self):
+        return [json.loads(record.getMessage()) for record in self.handler.records]
+
+
+    def test_phases_add_up(self):
+        timer = PhaseTimer()
+        for _ in range(3):
+            with timer.phase('fit'):
+                pass
+        with timer.phase('load'):
+            pass
+        first = timer.timings['fit']
+        with timer.phase('fit'):
+            sum(range(100000))
+
+        self.assertEqual(sorted(timer.timings), ['fit', 'load'])
+        self.assertGreater(timer.timings['fit'], first, "Phase time not accumulated.")
+
+
+    def test_emit(self):
+        emit('network', accuracy=0.5)
+        event = self.events()[0]
+        self.assertEqual(event['event'], 'network')
+        self.assertEqual(event['accuracy'], 0.5)
+
+
+    def test_emit_disabled(self):
+        metrics_logger.setLevel(logging.WARNING)
+        emit('network', accuracy=0.5)
+        self.assertEqual(self.handler.records, [], "Record logged while metrics are disabled.")
+
+
+    def test_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'block.prof')
+            with profile(path, trace_memory=True, top=5):
+                sorted(str(i) for i in range(1000))
+
+            self.assertTrue(os.path.exists(path), "Profile not written.")
+
+        events = {event['event']: event for event in self.events()}
+        self.assertEqual(events['profile']['path'], path)
+        self.assertLessEqual(len(events['profile']['hot_spots']), 5)
+        self.assertIn('allocations', events)
+
+
+if __name__ == '__main__':
+    unittest.main()
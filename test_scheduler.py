@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from budget import TrainingBudget
+from evaluator import Evaluator
+from scheduler import SuccessiveHalving
+
+class FakeEvaluator(Evaluator):
+    """Scores each network by a fixed accuracy and saves empty checkpoints."""
+
+    def __init__(self, accuracies, converged=(), seconds=None):
+        super().__init__()
+        self.accuracies = accuracies
+        self.converged = converged  # (tuple): keys that stop after one epoch
+        self.seconds = seconds or {}  # (dict): seconds each key takes per round
+        self.rounds = []
+        self.max_seconds = {}  # (dict): key -> time limit of each round it trained in
+
+    def run(self, genomes, dataset, budget=None, initial_epoch=0, checkpoint_dir=None):
+        # Networks submitted one at a time arrive under their genome key.
+        names = {key: str(network['nb_neurons']) for key, network in genomes.items()}
+        self.rounds.append((sorted(names.values()), initial_epoch, budget.max_epochs))
+        for key, name in names.items():
+            self.max_seconds.setdefault(name, []).append(budget.max_seconds)
+            open(os.path.join(checkpoint_dir, name + '.keras'), 'w').close()
+            epochs = initial_epoch + 1 if name in self.converged else budget.max_epochs
+            yield key, {'accuracy': self.accuracies[name], 'epochs': epochs,
+                        'seconds': self.seconds.get(name, 1.)}
+
+
+class TestSuccessiveHalving(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.accuracies = {str(i): i / 10 for i in range(9)}
+        self.genomes = {key: {'nb_neurons': int(key)} for key in self.accuracies}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+
+    def schedule(self, evaluator, rungs=(1, 3, 9)):
+        scheduler = SuccessiveHalving(evaluator, rungs=rungs, checkpoint_dir=self.directory.name)
+        return dict(scheduler.run(self.genomes, 'mnist', budget=TrainingBudget(max_epochs=9)))
+
+
+    def test_rounds_keep_the_best_third(self):
+        evaluator = FakeEvaluator(self.accuracies)
+        results = self.schedule(evaluator)
+
+        self.assertEqual(sorted(results), sorted(self.genomes), "Not every network scored.")
+        self.assertEqual(evaluator.rounds, [
+            (sorted(self.genomes), 0, 1),
+            (['6', '7', '8'], 1, 3),
+            (['8'], 3, 9),
+        ])
+        self.assertEqual(results['8']['rung'], 2)
+        self.assertEqual(results['0']['rung'], 0)
+        self.assertEqual(results['8']['seconds'], 3., "Seconds not summed over the rounds.")
+
+
+    def test_converged_networks_are_final(self):
+        evaluator = FakeEvaluator(self.accuracies, converged=('8',))
+        results = self.schedule(evaluator, rungs=(3, 6, 9))
+
+        self.assertEqual(results['8']['rung'], 0, "Converged network trained again.")
+        self.assertEqual(evaluator.rounds[1][0], ['5', '6', '7'],
+                         "Converged network took a survivor's place.")
+
+
+    def test_discards_checkpoints(self):
+        self.schedule(FakeEvaluator(self.accuracies))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+    def test_stops_at_the_budget(self):
+        evaluator = FakeEvaluator(self.accuracies)
+        scheduler = SuccessiveHalving(evaluator, rungs=(1, 3, 9),
+                                      checkpoint_dir=self.directory.name)
+        results = dict(scheduler.run(self.genomes, 'mnist', budget=TrainingBudget(max_epochs=3)))
+
+        self.assertEqual(len(evaluator.rounds), 2, "Trained past the budget's epochs.")
+        self.assertEqual(len(results), len(self.genomes))
+
+
+    def test_time_limit_covers_every_round(self):
+        evaluator = FakeEvaluator(self.accuracies, seconds={'8': 2.})
+        scheduler = SuccessiveHalving(evaluator, rungs=(1, 3, 9),
+                                      checkpoint_dir=self.directory.name)
+        budget = TrainingBudget(max_epochs=9, max_seconds=3.)
+        results = dict(scheduler.run(self.genomes, 'mnist', budget=budget))
+
+        self.assertEqual(evaluator.max_seconds['8'], [3., 1.], "Round given the full time limit.")
+        self.assertEqual(evaluator.max_seconds['7'], [3., 2., 1.])
+        self.assertTrue(results['8']['timed_out'], "Time limit not enforced across rounds.")
+        self.assertEqual(results['8']['rung'], 1)
+        self.assertEqual(results['8']['seconds'], 4.)
+        self.assertEqual(results['7']['rung'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
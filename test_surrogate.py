@@ -0,0 +1,43 @@
+import unittest
+from types import SimpleNamespace
+from surrogate import Surrogate
+
+class TestSurrogate(unittest.TestCase):
+    def setUp(self):
+        self.nn_param_choices = {
+        'nb_neurons': [64, 128, 256, 512, 768, 1024],
+        'nb_layers': [1, 2, 3, 4],
+        'activation': ['relu', 'elu', 'tanh', 'sigmoid'],
+        'optimizer': ['rmsprop', 'adam', 'sgd', 'adagrad','adadelta', 'adamax', 'nadam'],
+        }
+
+        self.surrogate = Surrogate(self.nn_param_choices, k=2)
+        self.network1 = {'nb_neurons': 1024, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'sgd'}
+        self.network2 = {'nb_neurons': 64, 'nb_layers': 3, 'activation': 'tanh', 'optimizer': 'adagrad'}
+
+
+    def test_no_observations(self):
+        self.assertIsNone(self.surrogate.predict(self.network1))
+
+
+    def test_ignores_untrained(self):
+        self.surrogate.observe([SimpleNamespace(network=self.network1, accuracy=0.)])
+        self.assertEqual(len(self.surrogate), 0)
+
+
+    def test_predict(self):
+        self.surrogate.observe([SimpleNamespace(network=self.network1, accuracy=0.9),
+                                SimpleNamespace(network=self.network2, accuracy=0.3)])
+
+        self.assertEqual(self.surrogate.predict(self.network1), 0.9, "Exact match not used.")
+
+        near1 = dict(self.network1, nb_neurons=768)
+        near2 = dict(self.network2, nb_neurons=128)
+        self.assertGreater(self.surrogate.predict(near1), self.surrogate.predict(near2))
+
+        ranked = self.surrogate.rank([SimpleNamespace(network=near2), SimpleNamespace(network=near1)])
+        self.assertEqual(ranked[0].network, near1, "Most promising network not first.")
+
+
+if __name__ == '__main__':
+    unittest.main()
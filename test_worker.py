@@ -0,0 +1,56 @@
+import sqlite3
+import unittest
+from distributed import encode_options
+from budget import TrainingBudget
+from worker import work
+
+class FlakyBroker():
+    """Broker holding one task, whose calls fail a number of times first."""
+
+    def __init__(self, claim_failures=0, complete_failures=0):
+        self.claim_failures = claim_failures
+        self.complete_failures = complete_failures
+        self.heartbeats = 0
+        self.results = {}
+        network = {'nb_neurons': 16, 'nb_layers': 1, 'activation': 'relu', 'optimizer': 'adam'}
+        options = encode_options({'budget': TrainingBudget(max_epochs=1), 'backend': 'numpy'})
+        self.task = (1, network, 'synthetic@0.2', options)
+
+    def claim(self, worker):
+        if self.claim_failures:
+            self.claim_failures -= 1
+            raise sqlite3.OperationalError('database is locked')
+        return self.task
+
+    def heartbeat(self, task_id, worker):
+        self.heartbeats += 1
+        raise sqlite3.OperationalError('disk I/O error')
+
+    def complete(self, task_id, worker, result):
+        if self.complete_failures:
+            self.complete_failures -= 1
+            raise sqlite3.OperationalError('database is locked')
+        self.results[task_id] = result
+
+    def fail(self, task_id, worker, error):
+        self.results[task_id] = error
+
+
+class TestWork(unittest.TestCase):
+    def test_retries_broker_errors(self):
+        broker = FlakyBroker(claim_failures=2, complete_failures=2)
+        work(broker, 'worker', poll_interval=0.01, heartbeat_interval=0.001, max_tasks=1)
+
+        self.assertIn('accuracy', broker.results[1], "Result not reported.")
+        self.assertGreater(broker.heartbeats, 1, "Heartbeats stopped after an error.")
+
+
+    def test_gives_up_reporting(self):
+        broker = FlakyBroker(complete_failures=100)
+        work(broker, 'worker', poll_interval=0.001, heartbeat_interval=0.01, max_tasks=2)
+
+        self.assertEqual(broker.results, {}, "Result reported through a failing broker.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,124 +1,595 @@
-"""
-Utility used by the Network class to actually train.
-
-Based on:
-    https://github.com/fchollet/keras/blob/master/examples/mnist_mlp.py
-
-"""
-from keras.datasets import mnist, cifar10
-from keras.models import Sequential
-from keras.layers import Dense, Dropout
-from keras.utils import to_categorical
-from keras.callbacks import EarlyStopping
-
-# Helper: Early stopping.
-early_stopper = EarlyStopping(patience=2)
-
-def get_cifar10():
-    """Retrieve the CIFAR dataset and process the data."""
-    # Set defaults.
-    nb_classes = 10
-    batch_size = 64
-    input_shape = (3072,)
-
-    # Get the data.
-    (x_train, y_train), (x_test, y_test) = cifar10.load_data()
-    x_train = x_train.reshape(50000, 3072)
-    x_test = x_test.reshape(10000, 3072)
-    x_train = x_train.astype('float32')
-    x_test = x_test.astype('float32')
-    x_train /= 255
-    x_test /= 255
-
-    # convert class vectors to binary class matrices
-    y_train = to_categorical(y_train, nb_classes)
-    y_test = to_categorical(y_test, nb_classes)
-
-    return (nb_classes, batch_size, input_shape, x_train, x_test, y_train, y_test)
-
-def get_mnist():
-    """Retrieve the MNIST dataset and process the data."""
-    # Set defaults.
-    nb_classes = 10
-    batch_size = 128
-    input_shape = (784,)
-
-    # Get the data.
-    (x_train, y_train), (x_test, y_test) = mnist.load_data()
-    x_train = x_train.reshape(60000, 784)
-    x_test = x_test.reshape(10000, 784)
-    x_train = x_train.astype('float32')
-    x_test = x_test.astype('float32')
-    x_train /= 255
-    x_test /= 255
-
-    # convert class vectors to binary class matrices
-    y_train = to_categorical(y_train, nb_classes)
-    y_test = to_categorical(y_test, nb_classes)
-
-    return (nb_classes, batch_size, input_shape, x_train, x_test, y_train, y_test)
-
-def compile_model(network, nb_classes, input_shape):
-    """Compile a sequential model.
-
-    Args:
-        network (dict): the parameters of the network
-
-    Returns:
-        a compiled network.
-
-    """
-    # Get our network parameters.
-    nb_layers = network['nb_layers']
-    nb_neurons = network['nb_neurons']
-    activation = network['activation']
-    optimizer = network['optimizer']
-
-    model = Sequential()
-
-    # Add each layer.
-    for i in range(nb_layers):
-
-        # Need input shape for first layer.
-        if i == 0:
-            model.add(Dense(nb_neurons, activation=activation, input_shape=input_shape))
-        else:
-            model.add(Dense(nb_neurons, activation=activation))
-
-        model.add(Dropout(0.2))  # hard-coded dropout
-
-    # Output layer.
-    model.add(Dense(nb_classes, activation='softmax'))
-
-    model.compile(loss='categorical_crossentropy', optimizer=optimizer,
-                  metrics=['accuracy'])
-
-    return model
-
-def train_and_score(network, dataset):
-    """Train the model, return test loss.
-
-    Args:
-        network (dict): the parameters of the network
-        dataset (str): Dataset to use for training/evaluating
-
-    """
-    if dataset == 'cifar10':
-        nb_classes, batch_size, input_shape, x_train, \
-            x_test, y_train, y_test = get_cifar10()
-    elif dataset == 'mnist':
-        nb_classes, batch_size, input_shape, x_train, \
-            x_test, y_train, y_test = get_mnist()
-
-    model = compile_model(network, nb_classes, input_shape)
-
-    model.fit(x_train, y_train,
-              batch_size=batch_size,
-              epochs=100,  # using early stopping, so no real limit
-              verbose=0,
-              validation_data=(x_test, y_test),
-              callbacks=[early_stopper])
-
-    score = model.evaluate(x_test, y_test, verbose=0)
-
-    return score[1]  # 1 is accuracy. 0 is loss.
+"""
+Utility used by the Network class to actually train.
+
+Based on:
+    https://github.com/fchollet/keras/blob/master/examples/mnist_mlp.py
+
+"""
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+import tensorflow as tf
+from keras.backend import clear_session
+from keras.models import Sequential, load_model
+from keras.layers import Dense, Dropout
+from keras.callbacks import Callback, EarlyStopping
+from keras.losses import categorical_crossentropy
+from datasets import get_cifar10, get_mnist, load_dataset, is_sharded, ShardedDataset, \
+    split_fidelity, stratified_subset
+from morphism import checkpoint_path, inherited_weights, keep_weights
+from budget import budget_for
+from profiling import PhaseTimer, peak_rss_mb, rss_mb
+
+# Most architectures kept built for reuse by compile_model().
+TEMPLATE_CACHE_SIZE = 8
+
+# Built models keyed by architecture, least recently used first.
+_templates = OrderedDict()
+
+class TimeLimit(Callback):
+    """Stop training once a wall time limit has passed."""
+
+    def __init__(self, max_seconds):
+        """Create the callback.
+
+        Args:
+            max_seconds (float): Seconds of training allowed
+
+        """
+        super().__init__()
+        self.max_seconds = max_seconds
+        self.timed_out = False
+        self._deadline = None
+
+    def on_train_begin(self, logs=None):
+        self._deadline = time.monotonic() + self.max_seconds
+
+    def on_train_batch_end(self, batch, logs=None):
+        if time.monotonic() >= self._deadline:
+            self.timed_out = True
+            self.model.stop_training = True
+
+def make_callbacks(budget):
+    """Create fresh callbacks that enforce a training budget.
+
+    Args:
+        budget (TrainingBudget): Limits on training
+
+    Returns:
+        (list): Keras callbacks for a single call to fit
+
+    """
+    callbacks = [EarlyStopping(monitor=budget.monitor, patience=budget.patience,
+                               min_delta=budget.min_delta,
+                               restore_best_weights=budget.restore_best_weights)]
+    if budget.max_seconds is not None:
+        callbacks.append(TimeLimit(budget.max_seconds))
+
+    return callbacks
+
+def array_pipeline(x, y, batch_size, shuffle=False, indices=None):
+    """Feed in-memory or memory-mapped arrays through tf.data.
+
+    Only indices are shuffled and batched; rows are gathered a batch at a
+    time in parallel with training, so the arrays are never copied whole.
+
+    Args:
+        x (ndarray): Inputs
+        y (ndarray): One-hot targets
+        batch_size (int): Examples per batch
+        shuffle (bool): Whether to reshuffle the examples every epoch
+        indices (ndarray): Rows to use, or None for all of them
+
+    Returns:
+        (tf.data.Dataset): Batches of (inputs, targets)
+
+    """
+    if indices is None:
+        count = len(x)
+        indices = tf.data.Dataset.range(count)
+    else:
+        count = len(indices)
+        indices = tf.data.Dataset.from_tensor_slices(indices)
+    if shuffle:
+        indices = indices.shuffle(count, reshuffle_each_iteration=True)
+
+    def gather(batch):
+        # Sorted indices read a memory-mapped array sequentially.
+        batch = np.sort(batch)
+        return x[batch], y[batch]
+
+    def load(batch):
+        x_batch, y_batch = tf.numpy_function(gather, [batch], (x.dtype, y.dtype))
+        x_batch.set_shape((None,) + x.shape[1:])
+        y_batch.set_shape((None,) + y.shape[1:])
+        return x_batch, y_batch
+
+    return indices.batch(batch_size) \
+        .map(load, num_parallel_calls=tf.data.AUTOTUNE) \
+        .prefetch(tf.data.AUTOTUNE)
+
+def shard_pipeline(sharded, split, batch_size, shuffle=False, cache=False, fidelity=1.):
+    """Stream a dataset stored as .npy shards through tf.data.
+
+    Only one shard is memory-mapped at a time, so the dataset does not
+    have to fit in memory.
+
+    Args:
+        sharded (ShardedDataset): The dataset
+        split (str): 'train' or 'test'
+        batch_size (int): Examples per batch
+        shuffle (bool): Whether to reshuffle the shards and the examples
+            within each shard every epoch
+        cache (bool): Whether to keep the batches in memory after the
+            first pass, for a split small enough to fit
+        fidelity (float): Fraction of each shard to use, sampled by class
+
+    Returns:
+        (tf.data.Dataset): Batches of (inputs, targets)
+
+    """
+    shards = sharded.shards(split)
+
+    # Rows used from each shard, picked up front so the length is known;
+    # Keras warns about running out of data otherwise.
+    shard_rows = []
+    for i, (x_path, y_path) in enumerate(shards):
+        y = np.load(y_path, mmap_mode='r')
+        shard_rows.append(np.arange(len(y)) if fidelity >= 1.
+                          else stratified_subset(y, fidelity, seed=i))
+    nb_batches = sum(-(-len(rows) // batch_size) for rows in shard_rows)
+
+    def generate():
+        order = np.random.permutation(len(shards)) if shuffle else range(len(shards))
+        for i in order:
+            x_path, y_path = shards[i]
+            x = np.load(x_path, mmap_mode='r')
+            y = np.load(y_path, mmap_mode='r')
+            rows = np.random.permutation(shard_rows[i]) if shuffle else shard_rows[i]
+            for start in range(0, len(rows), batch_size):
+                batch = np.sort(rows[start:start + batch_size])
+                yield x[batch], y[batch]
+
+    data = tf.data.Dataset.from_generator(generate, output_signature=(
+        tf.TensorSpec((None,) + sharded.input_shape, tf.float32),
+        tf.TensorSpec((None, sharded.nb_classes), tf.float32)))
+    data = data.apply(tf.data.experimental.assert_cardinality(nb_batches))
+    if cache:
+        data = data.cache()
+
+    return data.prefetch(tf.data.AUTOTUNE)
+
+def load_pipelines(dataset, batch_size=None):
+    """Build the training and test input pipelines for a dataset.
+
+    Args:
+        dataset (str): Dataset to use for training/evaluating, optionally
+            at a reduced fidelity
+        batch_size (int): Examples per batch, or None for the dataset's
+            default
+
+    Returns:
+        (tuple): nb_classes, input_shape, the training pipeline and the
+            test pipeline
+
+    """
+    dataset, fidelity = split_fidelity(dataset)
+    if is_sharded(dataset):
+        sharded = ShardedDataset(dataset)
+        batch_size = batch_size or sharded.batch_size
+        return (sharded.nb_classes, sharded.input_shape,
+                shard_pipeline(sharded, 'train', batch_size, shuffle=True, fidelity=fidelity),
+                # The test split is read every epoch for validation.
+                shard_pipeline(sharded, 'test', batch_size, cache=True, fidelity=fidelity))
+
+    nb_classes, default_batch_size, input_shape, x_train, \
+        x_test, y_train, y_test = load_dataset(dataset)
+    batch_size = batch_size or default_batch_size
+
+    train_rows = test_rows = None
+    if fidelity < 1.:
+        train_rows = stratified_subset(y_train, fidelity)
+        test_rows = stratified_subset(y_test, fidelity)
+
+    return (nb_classes, input_shape,
+            array_pipeline(x_train, y_train, batch_size, shuffle=True, indices=train_rows),
+            array_pipeline(x_test, y_test, batch_size, indices=test_rows))
+
+def build_model(nb_layers, nb_neurons, activation, nb_classes, input_shape):
+    """Build an uncompiled sequential model."""
+    model = Sequential()
+
+    # Add each layer.
+    for i in range(nb_layers):
+
+        # Need input shape for first layer.
+        if i == 0:
+            model.add(Dense(nb_neurons, activation=activation, input_shape=input_shape))
+        else:
+            model.add(Dense(nb_neurons, activation=activation))
+
+        model.add(Dropout(0.2))  # hard-coded dropout
+
+    # Output layer.
+    model.add(Dense(nb_classes, activation='softmax'))
+
+    return model
+
+def reinitialize(model):
+    """Give a built model fresh random weights, as if it were new."""
+    for layer in model.layers:
+        for weight, initializer in ((getattr(layer, 'kernel', None), 'kernel_initializer'),
+                                    (getattr(layer, 'bias', None), 'bias_initializer')):
+            if weight is not None:
+                # A new initializer draws a new seed; reusing one repeats its values.
+                initializer = getattr(layer, initializer)
+                initializer = type(initializer).from_config(initializer.get_config())
+                weight.assign(initializer(weight.shape, dtype=weight.dtype))
+
+def compile_model(network, nb_classes, input_shape, reuse=True):
+    """Compile a sequential model.
+
+    Models are reused between networks with the same architecture, which
+    only need new weights and a new optimizer, so building the layers is
+    skipped for every architecture seen recently.
+
+    Args:
+        network (dict): the parameters of the network
+        reuse (bool): Whether a cached model may be reused. Pass False
+            when another model of the same architecture is still in use.
+
+    Returns:
+        a compiled network.
+
+    """
+    # Get our network parameters.
+    nb_layers = network['nb_layers']
+    nb_neurons = network['nb_neurons']
+    activation = network['activation']
+    optimizer = network['optimizer']
+
+    architecture = (nb_layers, nb_neurons, activation, nb_classes, tuple(input_shape))
+    model = _templates.pop(architecture, None) if reuse else None
+    if model is None:
+        model = build_model(nb_layers, nb_neurons, activation, nb_classes, input_shape)
+    else:
+        reinitialize(model)
+
+    if TEMPLATE_CACHE_SIZE and reuse:
+        _templates[architecture] = model
+        while len(_templates) > TEMPLATE_CACHE_SIZE:
+            _templates.popitem(last=False)
+
+    model.compile(loss='categorical_crossentropy', optimizer=optimizer,
+                  metrics=['accuracy'])
+
+    return model
+
+def prepare_model(network, dataset, nb_classes, input_shape, timer, initial_epoch=0,
+                  checkpoint_dir=None, weights_dir=None, parents=None, reuse=True):
+    """Create the model a network starts training from.
+
+    The model is restored from its checkpoint when resuming, starts from
+    its parent's weights when they are available, and is otherwise new.
+    Arguments are as for train_and_evaluate().
+
+    Returns:
+        (tuple): The compiled model, the epoch to start training from and
+            whether the weights were inherited from a parent
+
+    """
+    checkpoint = None
+    if checkpoint_dir is not None:
+        checkpoint = checkpoint_path(checkpoint_dir, network, dataset, '.keras')
+
+    if initial_epoch and checkpoint is not None and os.path.exists(checkpoint):
+        # Resume from the weights and optimizer state of the last run.
+        with timer.phase('restore'):
+            return load_model(checkpoint), initial_epoch, False
+
+    with timer.phase('compile'):
+        model = compile_model(network, nb_classes, input_shape, reuse)
+
+    with timer.phase('inherit'):
+        weights = inherited_weights(network, dataset, weights_dir, parents)
+        if weights is not None:
+            model.set_weights(weights)
+
+    return model, 0, weights is not None
+
+def save_trained(model, network, dataset, timer, checkpoint_dir=None, weights_dir=None):
+    """Save a trained model for resuming and its weights for children."""
+    if checkpoint_dir is not None:
+        with timer.phase('save'):
+            model.save(checkpoint_path(checkpoint_dir, network, dataset, '.keras'))
+
+    if weights_dir is not None:
+        with timer.phase('save'):
+            keep_weights(weights_dir, network, dataset, model.get_weights())
+
+def train_and_evaluate(network, dataset, budget=None, initial_epoch=0,
+                       checkpoint_dir=None, weights_dir=None, parents=None):
+    """Train the model and return its test scores.
+
+    Args:
+        network (dict): the parameters of the network
+        dataset (str): Dataset to use for training/evaluating
+        budget (TrainingBudget): Limits on training, defaults to the
+            dataset's budget
+        initial_epoch (int): Epoch to resume training from
+        checkpoint_dir (str): Directory to save the trained model in, and
+            to load it from when resuming
+        weights_dir (str): Directory to save the trained weights in, for
+            children to inherit, and to load the parent's weights from
+        parents (dict): Parameters of the network each network was bred
+            from, keyed by genome key. A network whose parent's weights
+            are in weights_dir starts from them instead of random weights.
+
+    Returns:
+        (dict): accuracy and loss on the test set, the total number of
+            epochs trained and the number run by this call, the wall time
+            in seconds, the time spent in each phase, the current and the
+            lifetime peak resident memory of the process in megabytes,
+            whether training hit the time limit and whether the weights
+            were inherited from a parent
+
+    """
+    start = time.time()
+    timer = PhaseTimer()
+    if budget is None:
+        budget = budget_for(dataset)
+
+    # Drop the backend state left by earlier networks, so a long sweep
+    # does not slow down or grow in memory.
+    with timer.phase('clear'):
+        clear_session()
+
+    with timer.phase('load'):
+        nb_classes, input_shape, train_data, test_data = load_pipelines(
+            dataset, network.get('batch_size') or budget.batch_size)
+
+    model, initial_epoch, inherited = prepare_model(
+        network, dataset, nb_classes, input_shape, timer, initial_epoch,
+        checkpoint_dir, weights_dir, parents)
+
+    callbacks = make_callbacks(budget)
+    with timer.phase('fit'):
+        history = model.fit(train_data,
+                            epochs=budget.max_epochs,
+                            initial_epoch=initial_epoch,
+                            shuffle=False,  # The pipeline shuffles.
+                            verbose=0,
+                            validation_data=test_data,
+                            callbacks=callbacks)
+
+    save_trained(model, network, dataset, timer, checkpoint_dir, weights_dir)
+
+    with timer.phase('evaluate'):
+        score = model.evaluate(test_data, verbose=0)
+
+    return {
+        'accuracy': score[1],
+        'loss': score[0],
+        'epochs': initial_epoch + len(history.epoch),
+        'epochs_run': len(history.epoch),
+        'seconds': time.time() - start,
+        'timings': timer.timings,
+        'rss_mb': rss_mb(),
+        'peak_rss_mb': peak_rss_mb(),
+        'timed_out': any(getattr(callback, 'timed_out', False) for callback in callbacks),
+        'inherited': inherited,
+    }
+
+class _Member():
+    """Training state of one network in a group trained by train_group()."""
+
+    def __init__(self, network, model, epoch, inherited):
+        self.network = network
+        self.model = model
+        self.epoch = epoch
+        self.epochs_run = 0
+        self.inherited = inherited
+        self.best = None
+        self.best_weights = None
+        self.wait = 0
+        self.stopped = False
+        self.timed_out = False
+        self.seconds = 0.  # (float): this member's share of the training time
+
+    def end_epoch(self, value, budget):
+        """Apply the budget's early stopping rule to an epoch's monitored value."""
+        self.epoch += 1
+        self.epochs_run += 1
+
+        if self.best is None:
+            improved = True
+        elif 'acc' in budget.monitor:
+            improved = value > self.best + budget.min_delta
+        else:
+            improved = value < self.best - budget.min_delta
+
+        if improved:
+            self.best = value
+            self.wait = 0
+            if budget.restore_best_weights:
+                self.best_weights = self.model.get_weights()
+            return
+
+        self.wait += 1
+        if self.wait >= budget.patience:
+            self.stopped = True
+            if self.best_weights is not None:
+                self.model.set_weights(self.best_weights)
+
+def _fused_step(models):
+    """Return a compiled function that trains every model on one batch.
+
+    The function returns each model's mean loss and accuracy on the batch.
+    """
+    @tf.function
+    def step(x, y):
+        labels = tf.argmax(y, axis=1)
+        scores = []
+        for model in models:
+            with tf.GradientTape() as tape:
+                predictions = model(x, training=True)
+                loss = tf.reduce_mean(categorical_crossentropy(y, predictions))
+            gradients = tape.gradient(loss, model.trainable_variables)
+            model.optimizer.apply_gradients(zip(gradients, model.trainable_variables))
+            hits = tf.equal(tf.argmax(predictions, axis=1), labels)
+            scores.append(tf.stack([loss, tf.reduce_mean(tf.cast(hits, tf.float32))]))
+        return tf.stack(scores)
+
+    return step
+
+def _fused_measure(models):
+    """Return a compiled function that sums every model's loss and hits on one batch."""
+    @tf.function
+    def measure(x, y):
+        labels = tf.argmax(y, axis=1)
+        scores = []
+        for model in models:
+            predictions = model(x, training=False)
+            hits = tf.equal(tf.argmax(predictions, axis=1), labels)
+            scores.append(tf.stack([tf.reduce_sum(categorical_crossentropy(y, predictions)),
+                                    tf.reduce_sum(tf.cast(hits, tf.float32))]))
+        return tf.stack(scores)
+
+    return measure
+
+def _score(measure, data):
+    """Return the mean loss and accuracy of each model over a pipeline."""
+    totals = 0.
+    count = 0
+    for x, y in data:
+        totals += measure(x, y)
+        count += x.shape[0]
+
+    return totals.numpy() / count
+
+def train_group(networks, dataset, budget=None, initial_epoch=0, checkpoint_dir=None,
+                weights_dir=None, parents=None):
+    """Train several networks side by side on the same batches.
+
+    Every batch is loaded once and fed to all the networks in a single
+    compiled step, so small networks share the cost of loading data and
+    of each step instead of paying for it one network at a time. Each
+    network keeps its own optimizer, early stopping and scores.
+
+    Args:
+        networks (list): Parameters of each network, which must all use
+            the same batch size
+        dataset (str): Dataset to use for training/evaluating
+        budget (TrainingBudget): Limits on training each network
+        initial_epoch (int): Epoch to resume training from
+        checkpoint_dir (str): Directory to save the trained models in
+        weights_dir (str): Directory of weights to inherit and save
+        parents (dict): Parameters of each network's parent, by genome key
+
+    Returns:
+        (list): A dict of scores for each network, as returned by
+            train_and_evaluate(). Wall time and phase timings are those
+            of the whole group. The budget's time limit applies to each
+            network's equal share of the time spent training the group.
+
+    """
+    start = time.time()
+    timer = PhaseTimer()
+    if budget is None:
+        budget = budget_for(dataset)
+    if budget.monitor not in ('loss', 'accuracy', 'val_loss', 'val_accuracy'):
+        raise ValueError("Cannot monitor %r when training a group" % budget.monitor)
+
+    with timer.phase('clear'):
+        clear_session()
+
+    with timer.phase('load'):
+        nb_classes, input_shape, train_data, test_data = load_pipelines(
+            dataset, networks[0].get('batch_size') or budget.batch_size)
+
+    members = []
+    architectures = set()
+    for network in networks:
+        # Two members must not share one cached model.
+        architecture = (network['nb_layers'], network['nb_neurons'], network['activation'])
+        model, epoch, inherited = prepare_model(
+            network, dataset, nb_classes, input_shape, timer, initial_epoch,
+            checkpoint_dir, weights_dir, parents, reuse=architecture not in architectures)
+        architectures.add(architecture)
+        if not model.optimizer.built:
+            model.optimizer.build(model.trainable_variables)
+        members.append(_Member(network, model, epoch, inherited))
+
+    active = []
+    with timer.phase('fit'):
+        while True:
+            still_active = [member for member in members
+                            if not member.stopped and member.epoch < budget.max_epochs]
+            if not still_active:
+                break
+            if still_active != active:
+                # Retrace only when a member drops out.
+                active = still_active
+                models = [member.model for member in active]
+                step, measure = _fused_step(models), _fused_measure(models)
+
+            totals = 0.
+            batches = 0
+            timed_out = False
+            last = time.monotonic()
+            for x, y in train_data:
+                totals += step(x, y)
+                batches += 1
+
+                # The active members share the time of each step equally.
+                now = time.monotonic()
+                for member in active:
+                    member.seconds += (now - last) / len(active)
+                last = now
+                if budget.max_seconds is not None and \
+                        max(member.seconds for member in active) >= budget.max_seconds:
+                    timed_out = True
+                    break
+
+            totals = totals.numpy() / batches
+            scores = _score(measure, test_data)
+            for member, (loss, accuracy), (val_loss, val_accuracy) in zip(active, totals, scores):
+                logs = {'loss': loss, 'accuracy': accuracy,
+                        'val_loss': val_loss, 'val_accuracy': val_accuracy}
+                member.end_epoch(logs[budget.monitor], budget)
+                if timed_out:
+                    member.stopped = member.timed_out = True
+
+    for member in members:
+        save_trained(member.model, member.network, dataset, timer, checkpoint_dir, weights_dir)
+
+    with timer.phase('evaluate'):
+        scores = _score(_fused_measure([member.model for member in members]), test_data)
+
+    seconds = time.time() - start
+    return [{
+        'accuracy': float(accuracy),
+        'loss': float(loss),
+        'epochs': member.epoch,
+        'epochs_run': member.epochs_run,
+        'seconds': seconds,
+        'timings': timer.timings,
+        'rss_mb': rss_mb(),
+        'peak_rss_mb': peak_rss_mb(),
+        'timed_out': member.timed_out,
+        'inherited': member.inherited,
+        'group_size': len(members),
+    } for member, (loss, accuracy) in zip(members, scores)]
+
+def train_and_score(network, dataset, budget=None):
+    """Train the model, return test accuracy.
+
+    Args:
+        network (dict): the parameters of the network
+        dataset (str): Dataset to use for training/evaluating
+        budget (TrainingBudget): Limits on training, defaults to the
+            dataset's budget
+
+    """
+    return train_and_evaluate(network, dataset, budget)['accuracy']
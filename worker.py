@@ -0,0 +1,133 @@
+"""
+Worker entry point for distributed evaluation.
+
+Run one or more workers on any host that can open the broker database,
+then run the search with a DistributedEvaluator on the same database:
+
+    python worker.py --broker /shared/queue.db
+"""
+import os
+import time
+import socket
+import logging
+import argparse
+import threading
+import traceback
+from broker import SQLiteBroker
+from distributed import decode_options
+from evaluator import get_trainer
+from log_config import setup_logging
+
+# Broker errors in a row after which a result is given up on.
+MAX_BROKER_ERRORS = 10
+
+def call_broker(call, *args, interval=5., max_errors=None):
+    """Call the broker, retrying errors such as a database locked by another host.
+
+    Args:
+        call (callable): Broker method to call
+        args: Arguments for the call
+        interval (float): Seconds to wait before each retry
+        max_errors (int): Errors in a row after which the last one is
+            raised, or None to retry forever
+
+    Returns:
+        The value returned by the call
+
+    """
+    errors = 0
+    while True:
+        try:
+            return call(*args)
+        except Exception as error:
+            errors += 1
+            logging.warning("%s failed (%d in a row): %s", call.__name__, errors, error)
+            if max_errors is not None and errors >= max_errors:
+                raise
+            time.sleep(interval)
+
+def heartbeat(broker, task_id, name, interval, stopped):
+    """Send heartbeats for a task until it is finished."""
+    while not stopped.wait(interval):
+        try:
+            alive = broker.heartbeat(task_id, name)
+        except Exception as error:
+            # A missed beat is harmless; the next one may get through.
+            logging.warning("Heartbeat for task %d failed: %s", task_id, error)
+            continue
+        if not alive:
+            logging.warning("Task %d was reassigned", task_id)
+            return
+
+def work(broker, name, poll_interval=5., heartbeat_interval=10., max_tasks=None):
+    """Train networks from the queue until stopped.
+
+    Broker errors are logged and retried. A result that cannot be reported
+    after MAX_BROKER_ERRORS attempts is dropped, and the coordinator
+    requeues its task once the heartbeats stop.
+
+    Args:
+        broker (SQLiteBroker): Task queue shared with the coordinator
+        name (str): Name identifying this worker
+        poll_interval (float): Seconds to wait when the queue is empty
+        heartbeat_interval (float): Seconds between heartbeats
+        max_tasks (int): Stop after this many tasks, or None to run forever
+
+    """
+    done = 0
+    while max_tasks is None or done < max_tasks:
+        task = call_broker(broker.claim, name, interval=poll_interval)
+        if task is None:
+            time.sleep(poll_interval)
+            continue
+
+        task_id, network, dataset, options = task
+        logging.info("Training task %d: %s", task_id, network)
+        stopped = threading.Event()
+        beats = threading.Thread(target=heartbeat,
+                                 args=(broker, task_id, name, heartbeat_interval, stopped),
+                                 daemon=True)
+        beats.start()
+        try:
+            options = decode_options(options)
+            train_and_evaluate = get_trainer(options.pop('backend', 'keras'))
+            report, value = broker.complete, train_and_evaluate(network, dataset, **options)
+        except Exception:
+            report, value = broker.fail, traceback.format_exc()
+
+        # Heartbeats go on while reporting, so the task is not requeued.
+        try:
+            call_broker(report, task_id, name, value, interval=poll_interval,
+                        max_errors=MAX_BROKER_ERRORS)
+        except Exception:
+            logging.error("Gave up reporting task %d, it will be requeued", task_id)
+        finally:
+            stopped.set()
+            beats.join()
+        done += 1
+
+def main():
+    """Pull networks from the broker and train them."""
+    parser = argparse.ArgumentParser(description="Train networks queued by a coordinator.")
+    parser.add_argument('--broker', required=True, help='path to the SQLite task queue')
+    parser.add_argument('--name', default='%s-%d' % (socket.gethostname(), os.getpid()),
+                        help='name identifying this worker')
+    parser.add_argument('--poll', type=float, default=5.,
+                        help='seconds to wait when the queue is empty')
+    parser.add_argument('--heartbeat', type=float, default=10.,
+                        help='seconds between heartbeats')
+    parser.add_argument('--data-dir', help='directory to memory-map datasets from')
+    parser.add_argument('--max-tasks', type=int, help='stop after this many tasks')
+    args = parser.parse_args()
+
+    # Log to stderr; scores are recorded by the coordinator.
+    setup_logging(log_file=None, metrics_file=None)
+
+    if args.data_dir is not None:
+        from datasets import set_data_dir
+        set_data_dir(args.data_dir)
+
+    work(SQLiteBroker(args.broker), args.name, args.poll, args.heartbeat, args.max_tasks)
+
+if __name__ == '__main__':
+    main()